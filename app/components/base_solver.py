@@ -3,11 +3,11 @@ import logging
 import re
 import asyncio
 import random
-from telethon import events
 from telethon.tl.types import Message
-from telethon.utils import get_display_name
 from config import settings
+from app.context import get_application
 from app.logging_service import LogType, format_and_log
+from app.rate_limiter import rate_limiter
 from app.utils import get_qa_answer_from_redis, save_qa_answer_to_redis
 from app import gemini_client
 
@@ -22,7 +22,8 @@ class BaseExamSolver:
         self.keywords = keywords
         
         if self.exam_config.get('enabled'):
-            self.client.client.on(events.NewMessage(incoming=True, chats=settings.GAME_GROUP_IDS))(self.handler)
+            get_application().register_message_handler(self.handler, name=log_module_name,
+                                                       chats=settings.GAME_GROUP_IDS, keywords=self.keywords)
 
     def extract_question_options(self, message: Message) -> dict:
         raise NotImplementedError
@@ -61,19 +62,18 @@ class BaseExamSolver:
         await save_qa_answer_to_redis(self.redis_db, self.redis_db_name, question, answer_text)
         format_and_log(LogType.TASK, f"{self.log_module_name}: 答案入库", {'问题': question, '答案': answer_text})
 
-    async def handler(self, event):
+    async def handler(self, ctx):
         if not self.me: return
         
-        message = event.message
-        text = message.text
+        message = ctx.message
+        text = ctx.text
         
         if not text or not all(keyword in text for keyword in self.keywords):
             return
             
-        format_and_log(LogType.TASK, f"流程启动: {self.log_module_name}", {'状态': '关键词匹配成功', '消息ID': event.id})
+        format_and_log(LogType.TASK, f"流程启动: {self.log_module_name}", {'状态': '关键词匹配成功', '消息ID': message.id})
         
-        my_display_name = get_display_name(self.me)
-        is_our_turn = f"@{self.me.username}" in text or f"@{my_display_name}" in text
+        is_our_turn = ctx.is_mentioning_me
         
         parsed_data = self.extract_question_options(message)
         question = parsed_data.get("question")
@@ -109,7 +109,7 @@ class BaseExamSolver:
             delay = random.randint(delay_config['min'], delay_config['max'])
             await asyncio.sleep(delay)
             
-            await event.message.reply(f".作答 {answer_letter}")
+            await rate_limiter.run('send', lambda: message.reply(f".作答 {answer_letter}"))
             format_and_log(LogType.TASK, f"流程完成: {self.log_module_name}", {'状态': '已发送作答指令', '延时': f'{delay}秒'})
             
         elif is_our_turn:
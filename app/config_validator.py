@@ -38,7 +38,6 @@ class TaskJitterModel(BaseModel):
     biguan: DelayModel
     taiyi_yindao: DelayModel
     huangfeng_garden: DelayModel
-    learn_recipes: DelayModel
 
 class RedisModel(BaseModel):
     enabled: bool
@@ -81,6 +80,10 @@ class LogRotationModel(BaseModel):
     max_bytes: int
     backup_count: int
 
+class RateLimitModel(BaseModel):
+    rate: float = Field(gt=0)
+    burst: conint(gt=0)
+
 class LoggingSwitchesModel(BaseModel):
     system_activity: bool
     task_activity: bool
@@ -91,7 +94,42 @@ class LoggingSwitchesModel(BaseModel):
     debug_log: bool
     log_edits: bool
     log_deletes: bool
+    # 键为日志开关名 (如 msg_recv) 或日志标题 (如 Redis-发布)
+    rate_limits: Dict[str, RateLimitModel] = {}
+    sampling: Dict[str, conint(gt=0)] = {}
+    suppressed_summary_seconds: conint(gt=0) = 60
     
+class RawArchiveModel(BaseModel):
+    enabled: bool = False
+    keep_text_log: bool = True
+    rotate_minutes: conint(gt=0) = 60
+    max_bytes: conint(gt=0) = 50 * 1024 * 1024
+    compression: constr(pattern=r'^(gzip|zstd)$') = 'gzip'
+
+class LogIndexModel(BaseModel):
+    enabled: bool = False
+    retention_days: conint(gt=0) = 7
+
+class PerformanceModel(BaseModel):
+    chat_state_ttl_seconds: conint(gt=0) = 300
+    max_concurrent_sends: conint(gt=0) = 3
+    rate_limits: Dict[str, RateLimitModel] = {}
+    timestamp_flush_interval_seconds: conint(gt=0) = 5
+    query_cache_ttl: Dict[str, conint(ge=0)] = {}
+    deadline_guard_seconds: float = Field(default=1, ge=0)
+    progress_edit_interval_ms: conint(ge=0) = 1500
+    latency_samples: conint(gt=0) = 500
+    pipeline_max_in_flight: conint(gt=0) = 5
+    message_cache_size: conint(gt=0) = 2000
+    sender_name_ttl_seconds: conint(gt=0) = 3600
+    sender_name_cache_size: conint(gt=0) = 5000
+    redis_inbox_size: conint(gt=0) = 500
+    redis_task_concurrency: Dict[str, conint(gt=0)] = {}
+    redis_overload_policy: constr(pattern=r'^(block|drop)$') = 'block'
+    redis_coalesce_task_types: List[str] = []
+    log_queue_size: conint(gt=0) = 10000
+    log_flush_interval_ms: conint(gt=0) = 200
+
 class HeartbeatModel(BaseModel):
     active_enabled: bool
     active_interval_minutes: int
@@ -147,4 +185,7 @@ class ConfigModel(BaseModel):
     
     log_rotation: LogRotationModel
     logging_switches: LoggingSwitchesModel
+    raw_archive: RawArchiveModel = RawArchiveModel()
+    log_index: LogIndexModel = LogIndexModel()
     heartbeat: HeartbeatModel
+    performance: PerformanceModel = PerformanceModel()
@@ -30,6 +30,8 @@ CRAFTING_SESSIONS_KEY = "crafting_sessions"
 KNOWLEDGE_SESSIONS_KEY = "knowledge_sessions"
 # [新增] 用于存储持久化协同任务状态的键
 COORDINATION_SESSIONS_KEY = "coordination_sessions"
+# [新增] 待自动删除的消息 (有序集合，分值为到期时间戳)，按账户区分
+PENDING_DELETIONS_KEY = "tg_helper:pending_deletions"
 
 # QA Database keys from config
 XUANGU_DB_NAME_KEY = "xuangu_db_name"
@@ -8,6 +8,7 @@ import time
 import traceback
 from importlib import reload
 
+import pytz
 import redis.asyncio as redis
 from telethon.errors.rpcerrorlist import MessageEditTimeExpiredError
 
@@ -15,8 +16,11 @@ from app import gemini_client
 from app.character_stats_manager import stats_manager
 from app.constants import GAME_EVENTS_CHANNEL, TASK_CHANNEL, STATE_KEY_PROFILE
 from app.context import get_application, set_application, set_scheduler
+from app.log_index import create_log_index_handler
+from app.log_pipeline import BatchedRotatingFileHandler, BatchedStreamHandler, log_pipeline
 from app.logging_service import LogType, TimezoneFormatter, format_and_log
 from app.plugins import load_all_plugins
+from app.raw_archive import JsonlArchiveHandler
 from app.redis_client import initialize_redis
 from app.task_scheduler import scheduler, shutdown
 from app.telegram_client import CommandTimeoutError, TelegramClient
@@ -25,11 +29,6 @@ from config import settings
 
 from app import event_dispatcher
 
-class UnbufferedStreamHandler(logging.StreamHandler):
-    def emit(self, record):
-        super().emit(record)
-        self.flush()
-
 class Application:
     def __init__(self):
         from app.data_manager import data_manager
@@ -85,6 +84,10 @@ class Application:
 
     def setup_logging(self):
         print("开始配置日志系统...", flush=True)
+        # [核心修改] 所有处理器都在后台日志线程中运行，事件循环只负责入队
+        log_pipeline.configure(settings.PERFORMANCE_CONFIG.get('log_queue_size', 10000),
+                               settings.PERFORMANCE_CONFIG.get('log_flush_interval_ms', 200))
+
         app_logger = logging.getLogger("app")
         if app_logger.hasHandlers(): app_logger.handlers.clear()
         
@@ -99,9 +102,8 @@ class Application:
             tz_name=settings.TZ
         )
 
-        stream_handler = UnbufferedStreamHandler(sys.stdout)
+        stream_handler = BatchedStreamHandler(sys.stdout)
         stream_handler.setFormatter(console_formatter)
-        app_logger.addHandler(stream_handler)
         
         os.makedirs('logs', exist_ok=True)
 
@@ -109,7 +111,7 @@ class Application:
             def filter(self, record):
                 return record.levelno <= logging.WARNING
 
-        main_log_handler = logging.handlers.RotatingFileHandler(
+        main_log_handler = BatchedRotatingFileHandler(
             settings.LOG_FILE,
             maxBytes=settings.LOG_ROTATION_CONFIG['max_bytes'],
             backupCount=settings.LOG_ROTATION_CONFIG['backup_count'],
@@ -117,9 +119,8 @@ class Application:
         )
         main_log_handler.setFormatter(file_formatter)
         main_log_handler.addFilter(InfoFilter())
-        app_logger.addHandler(main_log_handler)
 
-        error_log_handler = logging.handlers.RotatingFileHandler(
+        error_log_handler = BatchedRotatingFileHandler(
             settings.ERROR_LOG_FILE,
             maxBytes=settings.LOG_ROTATION_CONFIG['max_bytes'],
             backupCount=settings.LOG_ROTATION_CONFIG['backup_count'],
@@ -127,7 +128,10 @@ class Application:
         )
         error_log_handler.setFormatter(file_formatter)
         error_log_handler.setLevel(logging.ERROR)
-        app_logger.addHandler(error_log_handler)
+        # [新增] 可选的全文索引，同时接收 app 日志与原始消息
+        index_handler = create_log_index_handler()
+        index_handlers = [index_handler] if index_handler else []
+        log_pipeline.attach(app_logger, [stream_handler, main_log_handler, error_log_handler] + index_handlers)
 
         raw_logger = logging.getLogger('raw_messages')
         if raw_logger.hasHandlers(): raw_logger.handlers.clear()
@@ -135,25 +139,36 @@ class Application:
         if settings.LOGGING_SWITCHES.get('original_log_enabled'):
             raw_logger.setLevel(logging.INFO)
             raw_log_formatter = TimezoneFormatter(fmt='%(asctime)s - %(message)s\n--------------------\n', datefmt='%Y-%m-%d %H:%M:%S %Z', tz_name=settings.TZ)
-            raw_log_handler = logging.handlers.RotatingFileHandler(settings.RAW_LOG_FILE, maxBytes=settings.LOG_ROTATION_CONFIG['max_bytes'], backupCount=settings.LOG_ROTATION_CONFIG['backup_count'], encoding='utf-8')
-            raw_log_handler.setFormatter(raw_log_formatter)
-            raw_logger.addHandler(raw_log_handler)
+            raw_handlers = []
+            archive_config = settings.RAW_ARCHIVE_CONFIG
+            if not archive_config.get('enabled') or archive_config.get('keep_text_log', True):
+                raw_log_handler = BatchedRotatingFileHandler(settings.RAW_LOG_FILE, maxBytes=settings.LOG_ROTATION_CONFIG['max_bytes'], backupCount=settings.LOG_ROTATION_CONFIG['backup_count'], encoding='utf-8')
+                raw_log_handler.setFormatter(raw_log_formatter)
+                raw_handlers.append(raw_log_handler)
+            if archive_config.get('enabled'):
+                raw_handlers.append(JsonlArchiveHandler(
+                    settings.RAW_ARCHIVE_DIR, rotate_minutes=archive_config['rotate_minutes'],
+                    max_bytes=archive_config['max_bytes'], compression=archive_config['compression'],
+                    tz=pytz.timezone(settings.TZ)))
+            log_pipeline.attach(raw_logger, raw_handlers + index_handlers)
         else:
             raw_logger.setLevel(logging.CRITICAL + 1)
 
         logging.getLogger('apscheduler').setLevel(logging.ERROR)
         logging.getLogger('telethon').setLevel(logging.WARNING)
         logging.getLogger('asyncio').setLevel(logging.WARNING)
+        log_pipeline.start()
         
         print(f"日志系统配置完成。常规日志输出到 {settings.LOG_FILE}，错误日志输出到 {settings.ERROR_LOG_FILE}。", flush=True)
 
     def load_plugins_and_commands(self, is_reload=False):
         if is_reload:
             self.commands.clear(); self.task_functions.clear(); self.startup_checks.clear()
-            core_handlers = {self.client._unified_event_handler, self.client._deleted_message_handler}
+            core_handlers = {self.client._unified_event_handler, self.client._deleted_message_handler, self.client._chat_state_update_handler}
             if hasattr(self.client, 'client'):
                 for handler, callback in list(self.client.client.list_event_handlers()):
                     if callback not in core_handlers: self.client.client.remove_event_handler(callback, handler)
+            self.client.message_hub.clear()
         load_all_plugins(self)
 
     async def _run_startup_checks(self):
@@ -215,12 +230,18 @@ class Application:
 
             for task in background_tasks: task.cancel()
             await asyncio.gather(*background_tasks, return_exceptions=True)
+            await event_dispatcher.redis_task_executor.stop()
+
+            if self.client:
+                await self.client.flush_timestamps()
+                await self.client.deletion_scheduler.flush_store()
             
             if self.client and self.client.is_connected(): await self.client.disconnect()
             
             shutdown()
             
             format_and_log(LogType.SYSTEM, "核心服务", {'阶段': '应用已关闭'})
+            log_pipeline.stop()
 
     def register_command(self, name, handler, help_text="", category="默认", aliases=None, usage=None):
         if aliases is None: aliases = []
@@ -228,6 +249,12 @@ class Application:
         command_data = {"name": name, "handler": handler, "help": help_text, "category": category, "aliases": aliases, "usage": usage}
         for cmd_name in [name] + aliases: self.commands[cmd_name.lower()] = command_data
 
+    def register_message_handler(self, handler, name=None, chats=None, senders=None, keywords=None,
+                                 incoming=True, new_messages=True, edits=False):
+        """注册消息处理器。前置过滤条件由统一路由表判断，处理器接收 MessageContext。"""
+        self.client.message_hub.subscribe(handler, name=name, chats=chats, senders=senders, keywords=keywords,
+                                          incoming=incoming, new_messages=new_messages, edits=edits)
+
     def register_task(self, task_key, function, command_name, help_text):
         self.task_functions[task_key] = function
         
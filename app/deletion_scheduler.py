@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+消息自动删除调度器
+
+所有待删除消息共用一个按到期时间排序的最小堆和一个后台协程，
+取代"每条消息一个 sleep 任务"的做法。到期的消息按群组合并，
+每次 delete_messages 调用最多携带 MAX_BATCH_SIZE 个消息ID。
+
+待删除计划同时保存在 Redis 有序集合中 (成员为 "群组ID:消息ID"，分值为到期时间戳)，
+写入采用短暂延迟的合并写回；启动时重新载入，已过期的条目会立即分批删除。
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import defaultdict
+
+from app.logging_service import LogType, format_and_log
+
+# Telegram 单次删除请求允许的最大消息数
+MAX_BATCH_SIZE = 100
+# 到期时间相差在此窗口内的消息会合并到同一批删除
+BATCH_WINDOW_SECONDS = 1.0
+# 计划变更写回 Redis 的合并周期
+STORE_FLUSH_INTERVAL_SECONDS = 1.0
+
+
+class DeletionScheduler:
+    def __init__(self, delete_batch):
+        """
+        - delete_batch: 异步可调用对象 delete_batch(chat_id, message_ids)，负责实际删除。
+        """
+        self._delete_batch = delete_batch
+        self._heap = []
+        self._due = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        # Redis 持久化 (可选)
+        self._db = None
+        self._store_key = None
+        self._store_adds = {}
+        self._store_removes = set()
+        self._store_flush_task = None
+
+    def __contains__(self, key) -> bool:
+        return key in self._due
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def schedule(self, chat_id: int, message_id: int, delay_seconds: float):
+        """登记 (或重新登记) 一条消息的删除时间。"""
+        due = time.time() + delay_seconds
+        self._push((chat_id, message_id), due)
+        self._mark_store(chat_id, message_id, due)
+
+    def cancel(self, chat_id: int, message_id: int) -> bool:
+        """取消一条消息的删除计划；返回此前是否存在该计划。堆中的旧条目在出堆时惰性丢弃。"""
+        existed = self._due.pop((chat_id, message_id), None) is not None
+        if existed:
+            self._mark_store(chat_id, message_id, None)
+        return existed
+
+    def _push(self, key, due: float):
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+        self._ensure_worker()
+
+    # --- Redis 持久化 ---
+
+    @staticmethod
+    def _member(chat_id: int, message_id: int) -> str:
+        return f"{chat_id}:{message_id}"
+
+    def _mark_store(self, chat_id: int, message_id: int, due: float | None):
+        if self._db is None:
+            return
+        member = self._member(chat_id, message_id)
+        if due is None:
+            self._store_adds.pop(member, None)
+            self._store_removes.add(member)
+        else:
+            self._store_removes.discard(member)
+            self._store_adds[member] = due
+        if self._store_flush_task is None or self._store_flush_task.done():
+            self._store_flush_task = asyncio.create_task(self._delayed_flush_store())
+
+    async def _delayed_flush_store(self):
+        await asyncio.sleep(STORE_FLUSH_INTERVAL_SECONDS)
+        await self.flush_store()
+
+    async def flush_store(self):
+        """立即把累积的计划变更写回 Redis，供写回周期及关机流程调用。"""
+        if self._db is None or not self._db.is_connected:
+            return
+        # 从快照写入，确认成功后才从缓冲中移除；失败时缓冲保持原样，待下次写回重试
+        adds, removes = dict(self._store_adds), set(self._store_removes)
+        if not adds and not removes:
+            return
+        try:
+            # 使用原始管道而非包装后的命令：包装层会吞掉异常并返回 0，无法判断是否真正写入
+            pipe = self._db.pipeline(transaction=True)
+            if adds:
+                pipe.zadd(self._store_key, adds)
+            if removes:
+                pipe.zrem(self._store_key, *removes)
+            await pipe.execute()
+        except Exception as e:
+            format_and_log(LogType.ERROR, "删除计划写回失败", {
+                '错误': str(e), '待写入': len(adds), '待移除': len(removes)
+            }, level=logging.ERROR)
+            return
+        # 写回期间发生的新变更 (重新登记或取消) 保留在缓冲中
+        for member, due in adds.items():
+            if self._store_adds.get(member) == due:
+                del self._store_adds[member]
+        self._store_removes -= removes
+
+    async def load(self, db, store_key: str):
+        """绑定 Redis 存储并载入上次运行遗留的删除计划，过期条目将立即分批删除。"""
+        self._db, self._store_key = db, store_key
+        if db is None or not db.is_connected:
+            return
+        entries = await db.zrange(store_key, 0, -1, withscores=True) or []
+        now, overdue = time.time(), 0
+        for member, due in entries:
+            if isinstance(member, bytes):
+                member = member.decode()
+            try:
+                chat_id, message_id = (int(part) for part in member.rsplit(':', 1))
+            except ValueError:
+                self._store_removes.add(member)
+                continue
+            overdue += due <= now
+            self._push((chat_id, message_id), due)
+        format_and_log(LogType.SYSTEM, "状态加载", {
+            '模块': '待删除消息', '载入数量': len(entries), '已过期': overdue
+        })
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def _pop_due_batch(self, now: float) -> dict:
+        batch = defaultdict(list)
+        while self._heap:
+            due, _seq, key = self._heap[0]
+            if self._due.get(key) != due:
+                heapq.heappop(self._heap)
+                continue
+            if due > now + BATCH_WINDOW_SECONDS:
+                break
+            heapq.heappop(self._heap)
+            del self._due[key]
+            batch[key[0]].append(key[1])
+        return batch
+
+    async def _run(self):
+        while True:
+            # 丢弃已取消或已被重新登记的旧条目
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            wait_seconds = self._heap[0][0] - time.time()
+            if wait_seconds > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait_seconds)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+            for chat_id, message_ids in self._pop_due_batch(time.time()).items():
+                for start in range(0, len(message_ids), MAX_BATCH_SIZE):
+                    chunk = message_ids[start:start + MAX_BATCH_SIZE]
+                    try:
+                        await self._delete_batch(chat_id, chunk)
+                    except Exception as e:
+                        # 持久化的计划保留，下次启动时重试
+                        format_and_log(LogType.ERROR, "批量删除失败 (异常)", {
+                            '群组ID': chat_id, '消息数量': len(chunk), '错误': str(e)
+                        }, level=logging.ERROR)
+                        continue
+                    for message_id in chunk:
+                        if (chat_id, message_id) not in self._due:
+                            self._mark_store(chat_id, message_id, None)
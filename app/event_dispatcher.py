@@ -6,6 +6,7 @@ import logging
 from app.constants import GAME_EVENTS_CHANNEL, TASK_CHANNEL
 from app.context import get_application
 from app.logging_service import LogType, format_and_log
+from app.redis_task_executor import RedisTaskExecutor
 from config import settings
 
 
@@ -87,6 +88,30 @@ async def redis_message_handler(message):
         format_and_log(LogType.ERROR, "Redis 任务处理器异常", {'状态': '执行异常', '错误': str(e), '原始消息': message.get('data', '')})
 
 
+def _classify_message(app, message) -> str | None:
+    """
+    [新增] 在读取循环中确定消息的任务类型 (即执行通道)。
+    与本账号无关的消息在此直接丢弃，不进入收件箱。
+    """
+    try:
+        data = json.loads(message.get('data', '{}'))
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not app.master_switch or not isinstance(data, dict):
+        return None
+    my_id = str(app.client.me.id)
+    if message.get('channel') == GAME_EVENTS_CHANNEL:
+        return "game_event" if data.get("account_id") == my_id else None
+    task_type = data.get("task_type")
+    if task_type != "broadcast_command" and data.get("target_account_id") != my_id:
+        return None
+    return task_type or "unknown"
+
+
+# 创建全局单例
+redis_task_executor = RedisTaskExecutor(redis_message_handler)
+
+
 async def redis_listener_loop():
     app = get_application()
     while True:
@@ -106,8 +131,10 @@ async def redis_listener_loop():
                         format_and_log(LogType.WARNING, "Redis 监听器", {'状态': '中断', '原因': '连接在监听时丢失'})
                         break
                     if message and message.get('type') == 'message':
-                        format_and_log(LogType.DEBUG, "Redis 监听器", {'阶段': '收到消息', '原始返回': str(message)})
-                        asyncio.create_task(redis_message_handler(message))
+                        format_and_log(LogType.DEBUG, "Redis 监听器", {'阶段': '收到消息', '原始返回': message})
+                        task_type = _classify_message(app, message)
+                        if task_type:
+                            await redis_task_executor.submit(task_type, message)
         except Exception as e:
             format_and_log(LogType.ERROR, "Redis 监听循环异常", {'错误': str(e)}, level=logging.CRITICAL)
             await asyncio.sleep(15)
@@ -1,8 +1,35 @@
 # -*- coding: utf-8 -*-
 import re
 import logging
+from app.keyword_matcher import KeywordMatcher
 from app.logging_service import LogType, format_and_log
 
+# --- 预编译的正则 (导入时编译一次) ---
+
+_ITEMS_STRICT_RE = re.compile(r"【(.+?)】x([\d,]+)")
+_ITEMS_LOOSE_RE = re.compile(r"([^\s【】]+?)\s*x\s*(\d+)")
+_REALM_BREAKTHROUGH_RE = re.compile(r"成功突破至【([^】]+)】")
+_RESIDENCE_VISITOR_RE = re.compile(r"你的洞府外似乎有位\*\*“([^”]+)”\*\*前来拜访")
+_MEDITATION_GAINED_RE = re.compile(r"修为最终增加了\s*\*\*([\d,]+)\*\*\s*点")
+_MEDITATION_LOST_RE = re.compile(r"修为倒退了\s*\*\*(-?\d+)\*\*\s*点")
+_DIVINATION_ITEM_RE = re.compile(r"卦象显示，【(.+?)】的机缘已降临")
+_DIVINATION_COST_RE = re.compile(r"消耗\s*\*\*(.*?)\*\*\s*来换取", re.DOTALL)
+_DIVINATION_STONES_GAINED_RE = re.compile(r"获得了?\s*\*\*([\d,]+)\*\*\s*块灵石")
+_DIVINATION_CULTIVATION_RE = re.compile(r"修为增加了\s*\*\*([\d,]+)\*\*\s*点")
+_DIVINATION_STONES_LOST_RE = re.compile(r"遗失了\s*\*\*([\d,]+)\*\*\s*块灵石")
+_SOUL_ITEMS_RE = re.compile(r"带回了：\s*(.*?)\s*\*?\*?元婴成长\*?\*?", re.DOTALL)
+_SOUL_CULTIVATION_RE = re.compile(r"修为直接增加了\s*\*\*(\d+)\*\*\s*点")
+_SOUL_EXP_RE = re.compile(r"获得了\s*\*\*(\d+)\*\*\s*点经验")
+_SOUL_LEVEL_RE = re.compile(r"元婴突破至\s*(\d+)\s*级")
+_TRADE_GAINED_RE = re.compile(r"你获得了：\s*(.*)", re.DOTALL)
+_TRADE_SOLD_RE = re.compile(r"你成功出售了【(.+?)】x([\d,]+)")
+_CRAFTING_GAINED_RE = re.compile(r"最终获得【(.+?)】x\*\*([\d,]+)\*\*")
+_DONATION_CONSUMED_RE = re.compile(r"捐献了 \*\*【(.+?)】\*\*x([\d,]+)")
+_DONATION_CONTRIBUTION_RE = re.compile(r"获得了 \*\*([\d,]+)\*\* 点宗门贡献")
+_EXCHANGE_GAINED_RE = re.compile(r"获得了【(.+?)】x([\d,]+)")
+_EXCHANGE_COST_RE = re.compile(r"消耗了 \*\*([\d,]+)\*\* 点贡献")
+_DELIST_RE = re.compile(r"你已成功将 \*\*【(.+?)】\*\*x([\d,]+)")
+
 # --- 多策略解析器 ---
 
 def _parse_items_from_text(text: str) -> dict:
@@ -13,8 +40,7 @@ def _parse_items_from_text(text: str) -> dict:
     
     # 策略1: 严格正则匹配 (最常见、最高效)
     # 匹配：【物品名】x123 or 【物品名】x1,234
-    strict_pattern = r"【(.+?)】x([\d,]+)"
-    matches = re.findall(strict_pattern, text)
+    matches = _ITEMS_STRICT_RE.findall(text)
     if matches:
         for item, quantity_str in matches:
             gained_items[item] = int(quantity_str.replace(',', ''))
@@ -22,8 +48,7 @@ def _parse_items_from_text(text: str) -> dict:
 
     # 策略2: 宽松正则匹配 (兼容可能的格式变化)
     # 匹配：物品名 x 123
-    loose_pattern = r"([^\s【】]+?)\s*x\s*(\d+)"
-    matches = re.findall(loose_pattern, text)
+    matches = _ITEMS_LOOSE_RE.findall(text)
     if matches:
         for item, quantity_str in matches:
             # 过滤掉一些可能的误判，例如 "ID: 123"
@@ -37,7 +62,7 @@ def _parse_items_from_text(text: str) -> dict:
 
 def parse_realm_breakthrough(text: str) -> dict | None:
     """[新增] 解析境界突破事件"""
-    match = re.search(r"成功突破至【([^】]+)】", text)
+    match = _REALM_BREAKTHROUGH_RE.search(text)
     if match:
         return {
             "event_type": "REALM_BREAKTHROUGH",
@@ -47,7 +72,7 @@ def parse_realm_breakthrough(text: str) -> dict | None:
 
 def parse_residence_visitor(text: str) -> dict | None:
     """[新增] 解析洞府访客事件"""
-    match = re.search(r"你的洞府外似乎有位\*\*“([^”]+)”\*\*前来拜访", text)
+    match = _RESIDENCE_VISITOR_RE.search(text)
     if match:
         return {
             "event_type": "RESIDENCE_VISITOR",
@@ -61,7 +86,7 @@ def parse_meditation_result(text: str) -> dict | None:
         payload = {"event_type": "MEDITATION_COMPLETED", "gained_cultivation": 0, "gained_items": {}}
         
         # 解析最终增加的修为
-        cult_match = re.search(r"修为最终增加了\s*\*\*([\d,]+)\*\*\s*点", text)
+        cult_match = _MEDITATION_GAINED_RE.search(text)
         if cult_match:
             payload["gained_cultivation"] = int(cult_match.group(1).replace(',', ''))
             
@@ -76,7 +101,7 @@ def parse_meditation_result(text: str) -> dict | None:
         payload = {"event_type": "MEDITATION_FAILED", "lost_cultivation": 0}
         
         # 解析倒退的修为
-        cult_match = re.search(r"修为倒退了\s*\*\*(-?\d+)\*\*\s*点", text)
+        cult_match = _MEDITATION_LOST_RE.search(text)
         if cult_match:
             payload["lost_cultivation"] = abs(int(cult_match.group(1))) # 确保是正数
             
@@ -96,11 +121,11 @@ def parse_divination_result(text: str) -> dict | None:
             "item_to_get": None,
             "cost": {}
         }
-        item_match = re.search(r"卦象显示，【(.+?)】的机缘已降临", text)
+        item_match = _DIVINATION_ITEM_RE.search(text)
         if item_match:
             opportunity["item_to_get"] = item_match.group(1)
         
-        cost_text_match = re.search(r"消耗\s*\*\*(.*?)\*\*\s*来换取", text, re.DOTALL)
+        cost_text_match = _DIVINATION_COST_RE.search(text)
         if cost_text_match:
             opportunity["cost"] = _parse_items_from_text(cost_text_match.group(1))
 
@@ -118,19 +143,19 @@ def parse_divination_result(text: str) -> dict | None:
 
     if "【天降横财】" in text or "“金玉满堂”" in text:
         payload["result_name"] = "获得灵石"
-        match = re.search(r"获得了?\s*\*\*([\d,]+)\*\*\s*块灵石", text)
+        match = _DIVINATION_STONES_GAINED_RE.search(text)
         if match:
             payload["gained_spirit_stones"] = int(match.group(1).replace(',', ''))
     
     elif "“道心通明”" in text:
         payload["result_name"] = "获得修为"
-        match = re.search(r"修为增加了\s*\*\*([\d,]+)\*\*\s*点", text)
+        match = _DIVINATION_CULTIVATION_RE.search(text)
         if match:
             payload["gained_cultivation"] = int(match.group(1).replace(',', ''))
 
     elif "“小有破财”" in text:
         payload["result_name"] = "遗失灵石"
-        match = re.search(r"遗失了\s*\*\*([\d,]+)\*\*\s*块灵石", text)
+        match = _DIVINATION_STONES_LOST_RE.search(text)
         if match:
             payload["lost_spirit_stones"] = int(match.group(1).replace(',', ''))
     
@@ -154,22 +179,22 @@ def parse_nascent_soul_return(text: str) -> dict | None:
     }
     
     # 提取物品
-    items_text_match = re.search(r"带回了：\s*(.*?)\s*\*?\*?元婴成长\*?\*?", text, re.DOTALL)
+    items_text_match = _SOUL_ITEMS_RE.search(text)
     if items_text_match:
         payload["gained_items"] = _parse_items_from_text(items_text_match.group(1))
 
     # 提取修为增加
-    cultivation_match = re.search(r"修为直接增加了\s*\*\*(\d+)\*\*\s*点", text)
+    cultivation_match = _SOUL_CULTIVATION_RE.search(text)
     if cultivation_match:
         payload["gained_cultivation"] = int(cultivation_match.group(1))
         
     # 提取经验获得
-    exp_match = re.search(r"获得了\s*\*\*(\d+)\*\*\s*点经验", text)
+    exp_match = _SOUL_EXP_RE.search(text)
     if exp_match:
         payload["gained_exp"] = int(exp_match.group(1))
         
     # 提取等级突破
-    level_match = re.search(r"元婴突破至\s*(\d+)\s*级", text)
+    level_match = _SOUL_LEVEL_RE.search(text)
     if level_match:
         payload["new_level"] = int(level_match.group(1))
 
@@ -188,11 +213,11 @@ def parse_tower_challenge(text: str) -> dict | None:
 def parse_trade_completed(text: str) -> dict | None:
     """解析“交易”事件"""
     gained_items, sold_items = {}, {}
-    gained_match = re.search(r"你获得了：\s*(.*)", text, re.DOTALL)
+    gained_match = _TRADE_GAINED_RE.search(text)
     if gained_match:
         gained_items = _parse_items_from_text(gained_match.group(1))
         
-    sold_match = re.search(r"你成功出售了【(.+?)】x([\d,]+)", text)
+    sold_match = _TRADE_SOLD_RE.search(text)
     if sold_match:
         sold_items[sold_match.group(1)] = int(sold_match.group(2).replace(',', ''))
         
@@ -203,7 +228,7 @@ def parse_trade_completed(text: str) -> dict | None:
 def parse_crafting_completed(text: str, original_message_text: str = None) -> dict | None:
     """解析“炼制”事件"""
     gained_items = {item: int(q.replace(',', '')) for item, q in
-                    re.findall(r"最终获得【(.+?)】x\*\*([\d,]+)\*\*", text)}
+                    _CRAFTING_GAINED_RE.findall(text)}
     if gained_items and original_message_text:
         command_parts = original_message_text.split()
         crafted_quantity = 1
@@ -218,8 +243,8 @@ def parse_crafting_completed(text: str, original_message_text: str = None) -> di
 
 def parse_donation_completed(text: str) -> dict | None:
     """解析“宗门捐献”事件"""
-    consumed_match = re.search(r"捐献了 \*\*【(.+?)】\*\*x([\d,]+)", text)
-    contrib_match = re.search(r"获得了 \*\*([\d,]+)\*\* 点宗门贡献", text)
+    consumed_match = _DONATION_CONSUMED_RE.search(text)
+    contrib_match = _DONATION_CONTRIBUTION_RE.search(text)
     if consumed_match and contrib_match:
         return {
             "event_type": "DONATION_COMPLETED",
@@ -230,8 +255,8 @@ def parse_donation_completed(text: str) -> dict | None:
 
 def parse_exchange_completed(text: str) -> dict | None:
     """解析“宗门兑换”事件"""
-    gain_match = re.search(r"获得了【(.+?)】x([\d,]+)", text)
-    cost_match = re.search(r"消耗了 \*\*([\d,]+)\*\* 点贡献", text)
+    gain_match = _EXCHANGE_GAINED_RE.search(text)
+    cost_match = _EXCHANGE_COST_RE.search(text)
     if gain_match and cost_match:
         return {
             "event_type": "EXCHANGE_COMPLETED",
@@ -242,7 +267,7 @@ def parse_exchange_completed(text: str) -> dict | None:
 
 def parse_delist_completed(text: str) -> dict | None:
     """解析“下架”事件"""
-    match = re.search(r"你已成功将 \*\*【(.+?)】\*\*x([\d,]+)", text)
+    match = _DELIST_RE.search(text)
     if match:
         item_name = match.group(1)
         quantity = int(match.group(2).replace(',', ''))
@@ -268,23 +293,41 @@ EVENT_FINGERPRINTS = [
     ({"你向宗门捐献了", "获得了"}, parse_donation_completed),
 ]
 
-def dispatch_and_parse(text: str, original_message_text: str = None) -> dict | None:
+# 所有指纹关键词编译成一个匹配器：每条消息只扫描一遍，再用集合包含关系挑出候选解析器
+_FINGERPRINT_MATCHER = KeywordMatcher(keyword for keywords, _ in EVENT_FINGERPRINTS for keyword in keywords)
+_FINGERPRINT_SETS = [(frozenset(keywords), parser_func) for keywords, parser_func in EVENT_FINGERPRINTS]
+
+
+def match_fingerprints(text: str) -> list:
+    """返回指纹与文本匹配的所有解析函数 (按 EVENT_FINGERPRINTS 顺序)。"""
+    found = _FINGERPRINT_MATCHER.find(text)
+    if not found:
+        return []
+    return [parser_func for keywords, parser_func in _FINGERPRINT_SETS if keywords <= found]
+
+
+def dispatch_and_parse(text: str, original_message_text: str = None, fingerprints: list = None) -> dict | None:
     """
     主调度函数：接收消息文本，进行指纹识别，并调用相应的解析器。
+    - fingerprints: 可选，已预先识别出的解析函数列表，传入时不再重复做指纹匹配。
     """
-    for keywords, parser_func in EVENT_FINGERPRINTS:
-        if all(keyword in text for keyword in keywords):
-            try:
-                # 传递原始指令文本给需要它的解析器
-                if parser_func is parse_crafting_completed:
-                    return parser_func(text, original_message_text=original_message_text)
-                else:
-                    return parser_func(text)
-            except Exception as e:
-                format_and_log(
-                    LogType.ERROR, "域内解析失败", 
-                    {'事件': parser_func.__name__, '错误': str(e), '文本': text}, 
-                    level=logging.WARNING
-                )
-                return None
-    return None
+    if fingerprints is None:
+        fingerprints = match_fingerprints(text)
+    if not fingerprints:
+        return None
+
+    # 与原先的顺序扫描一致：只使用第一个匹配的解析器
+    parser_func = fingerprints[0]
+    try:
+        # 传递原始指令文本给需要它的解析器
+        if parser_func is parse_crafting_completed:
+            return parser_func(text, original_message_text=original_message_text)
+        else:
+            return parser_func(text)
+    except Exception as e:
+        format_and_log(
+            LogType.ERROR, "域内解析失败", 
+            {'事件': parser_func.__name__, '错误': str(e), '文本': text}, 
+            level=logging.WARNING
+        )
+        return None
@@ -35,6 +35,9 @@ game_adaptor = _create_adaptor()
 # --- [核心修复] 新增 divination 指令的代理 ---
 divination = game_adaptor.divination
 
+is_idempotent_query = game_adaptor.is_idempotent_query
+get_query_name = game_adaptor.get_query_name
+
 parse_profile = game_adaptor.parse_profile
 list_item = game_adaptor.list_item
 buy_item = game_adaptor.buy_item
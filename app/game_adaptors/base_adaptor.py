@@ -7,6 +7,24 @@ class BaseGameAdaptor(ABC):
     定义了所有游戏适配器必须实现的接口，确保上层插件可以统一调用。
     """
 
+    def get_query_name(self, command: str) -> str | None:
+        """
+        若指令为只读查询，返回生成它的适配器方法名 (如 'get_inventory')，否则返回 None。
+        只读查询可在并发调用间共享同一次发送与回复，并可按方法名配置结果缓存。
+        """
+        return None
+
+    def is_idempotent_query(self, command: str) -> bool:
+        """判断一条指令是否为只读查询。"""
+        return self.get_query_name(command) is not None
+
+    def get_affected_queries(self, command: str) -> tuple | None:
+        """
+        返回执行该指令后结果可能变化的查询 (适配器方法名)。
+        返回空元组表示不影响任何查询；返回 None 表示无法判断，调用方应作废全部查询缓存。
+        """
+        return None
+
     @abstractmethod
     def divination(self) -> str:
         """卜筮问天指令。"""
@@ -20,6 +20,48 @@ class MortalCultivationAdaptor(BaseGameAdaptor):
         , re.S | re.I
     )
 
+    QUERY_METHODS = (
+        'get_inventory', 'get_profile', 'get_sect_treasury', 'get_formation_info',
+        'get_my_stall', 'get_nascent_soul_status', 'get_crafting_list', 'huangfeng_garden',
+    )
+
+    # 改变游戏状态的指令 (按指令词) -> 结果会随之变化的查询
+    COMMAND_INVALIDATIONS = {
+        ".上架": ("get_inventory", "get_my_stall"),
+        ".下架": ("get_inventory", "get_my_stall"),
+        ".购买": ("get_inventory",),
+        ".炼制": ("get_inventory",),
+        ".学习": ("get_inventory", "get_crafting_list"),
+        ".闭关修炼": ("get_inventory", "get_profile"),
+        ".闯塔": ("get_inventory", "get_profile"),
+        ".卜筮问天": ("get_inventory", "get_profile"),
+        ".元婴出窍": ("get_inventory", "get_nascent_soul_status"),
+        ".宗门点卯": ("get_inventory", "get_sect_treasury"),
+        ".宗门传功": ("get_sect_treasury",),
+        ".宗门捐献": ("get_inventory", "get_sect_treasury"),
+        ".兑换": ("get_inventory", "get_sect_treasury"),
+        ".浇水": ("huangfeng_garden",),
+        ".除虫": ("huangfeng_garden",),
+        ".除草": ("huangfeng_garden",),
+        ".采药": ("get_inventory", "huangfeng_garden"),
+        ".播种": ("get_inventory", "huangfeng_garden"),
+        ".收敛气息": ("get_profile",),
+    }
+
+    def get_query_name(self, command: str) -> str | None:
+        command = command.strip()
+        for method_name in self.QUERY_METHODS:
+            if getattr(self, method_name)() == command:
+                return method_name
+        return None
+
+    def get_affected_queries(self, command: str) -> tuple | None:
+        command = command.strip()
+        if not command.startswith("."):
+            # 不是游戏指令 (如普通聊天)，不影响任何查询
+            return ()
+        return self.COMMAND_INVALIDATIONS.get(command.split()[0])
+
     def divination(self) -> str:
         return ".卜筮问天"
         
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+多关键词一次扫描
+
+把一组关键词编译成一个正则 (零宽前瞻 + 按长度降序的分支)，对文本只扫描一遍，
+返回文本中出现过的全部关键词。某位置只会报告最长的命中，因此预先为每个关键词
+记录它所包含的其他关键词，命中长关键词时一并计入，保证结果与逐个 `in` 判断一致。
+"""
+import re
+
+
+class KeywordMatcher:
+    def __init__(self, keywords):
+        self.keywords = tuple(sorted({k for k in keywords if k}, key=len, reverse=True))
+        self._regex = None
+        self._closure = {}
+        if self.keywords:
+            alternation = "|".join(re.escape(k) for k in self.keywords)
+            self._regex = re.compile(f"(?=({alternation}))", re.DOTALL)
+            self._closure = {k: frozenset(other for other in self.keywords if other in k) for k in self.keywords}
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def find(self, text: str) -> set:
+        """返回 text 中出现的所有关键词。"""
+        found = set()
+        if not self._regex or not text:
+            return found
+        for match in self._regex.finditer(text):
+            keyword = match.group(1)
+            if keyword not in found:
+                found |= self._closure[keyword]
+        return found
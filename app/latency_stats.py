@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+指令延迟统计
+
+按游戏指令的动词 (首个词) 分别记录各阶段耗时，每个 (动词, 阶段) 只保留最近
+MAX_SAMPLES 个样本，用于计算 p50/p95/p99，定位慢在本地队列、Telegram 还是游戏机器人。
+"""
+import math
+from collections import defaultdict, deque
+
+from config import settings
+
+MAX_SAMPLES = 500
+
+# 阶段 -> 展示名称 (按流程先后排列)
+STAGES = {
+    'queue': '排队',
+    'slowmode': '冷却等待',
+    'send': '发送RPC',
+    'reply': '等待回复',
+}
+
+
+def command_verb(command: str) -> str:
+    """取指令的动词部分，如 '.购买 123' -> '.购买'。"""
+    parts = command.strip().split(maxsplit=1)
+    return parts[0] if parts else command
+
+
+class LatencyStats:
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self._max_samples = max_samples
+        self._samples = defaultdict(lambda: deque(maxlen=self._max_samples))
+
+    def record(self, command: str, stage: str, seconds: float):
+        if seconds is None or seconds < 0:
+            return
+        self._samples[(command_verb(command), stage)].append(seconds)
+
+    @staticmethod
+    def _percentile(sorted_values: list, pct: float) -> float:
+        index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+        return sorted_values[index]
+
+    def get_percentiles(self) -> dict:
+        """返回 {动词: {阶段: {'count', 'p50', 'p95', 'p99'}}}，单位为秒。"""
+        result = defaultdict(dict)
+        for (verb, stage), samples in self._samples.items():
+            if not samples:
+                continue
+            values = sorted(samples)
+            result[verb][stage] = {
+                'count': len(values),
+                'p50': self._percentile(values, 50),
+                'p95': self._percentile(values, 95),
+                'p99': self._percentile(values, 99),
+            }
+        return dict(result)
+
+    def render(self) -> str:
+        percentiles = self.get_percentiles()
+        if not percentiles:
+            return "暂无指令延迟数据。"
+        lines = []
+        for verb in sorted(percentiles):
+            lines.append(f"\n**{verb}**")
+            for stage, stage_name in STAGES.items():
+                if data := percentiles[verb].get(stage):
+                    lines.append(
+                        f"- `{stage_name}`: p50 {data['p50'] * 1000:.0f}ms / p95 {data['p95'] * 1000:.0f}ms"
+                        f" / p99 {data['p99'] * 1000:.0f}ms (n={data['count']})"
+                    )
+        return "\n".join(lines)
+
+    def clear(self):
+        self._samples.clear()
+
+
+# 创建全局单例
+latency_stats = LatencyStats(settings.PERFORMANCE_CONFIG.get('latency_samples', MAX_SAMPLES))
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+本地日志全文索引 (可选)
+
+日志管线的后台线程把 app 日志与原始消息写入 SQLite FTS5 表 (trigram 分词，支持中文子串检索)，
+字段包括时间、日志类型、标题、账号、消息ID与正文；写入按批提交，超过保留期的记录定期清理。
+管理员可通过 `,查日志` 指令在 Telegram 中直接检索，无需登录服务器翻查日志文件。
+"""
+import logging
+import sqlite3
+import sys
+import time
+
+from config import settings
+
+PAGE_SIZE = 10
+_PRUNE_INTERVAL_SECONDS = 3600
+# 写入持续失败时最多保留的待写记录数，超出部分丢弃最旧的，避免内存无限增长
+_MAX_PENDING_ROWS = 10000
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS logs USING fts5(
+    ts UNINDEXED, type UNINDEXED, title, account UNINDEXED, msg_id UNINDEXED, text,
+    tokenize = 'trigram'
+)
+"""
+
+
+class LogIndexHandler(logging.Handler):
+    """在日志线程中缓存记录，由管线批量刷新时一次性提交。"""
+
+    def __init__(self, path: str, retention_days: int):
+        super().__init__()
+        self.retention_seconds = retention_days * 86400
+        self._rows = []
+        self._last_prune = 0
+        self._write_failing = False
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    @staticmethod
+    def _row(record) -> tuple:
+        raw_event = getattr(record, 'raw_event', None)
+        if raw_event is not None:
+            text = raw_event.get('text')
+            if text is None:
+                text = f"被删除消息ID: {raw_event.get('deleted_ids')}"
+            elif raw_event.get('sender'):
+                text = f"{raw_event['sender']}: {text}"
+            return (record.created, raw_event.get('type'), raw_event.get('chat') or "",
+                    settings.ACCOUNT_ID, raw_event.get('msg_id'), text)
+
+        log_data = getattr(record, 'log_data', None)
+        if log_data:
+            text = "\n".join(f"{key}: {value}" for key, value in log_data.items() if value is not None)
+        else:
+            text = record.getMessage()
+        if record.exc_text:
+            text = f"{text}\n{record.exc_text}"
+        return (record.created, getattr(record, 'log_type', record.levelname),
+                getattr(record, 'log_title', "") or "", settings.ACCOUNT_ID, None, text)
+
+    def emit(self, record):
+        try:
+            self._rows.append(self._row(record))
+        except Exception:
+            self.handleError(record)
+
+    def flush_batch(self):
+        if self._rows:
+            rows, self._rows = self._rows, []
+            try:
+                self._conn.executemany(
+                    "INSERT INTO logs (ts, type, title, account, msg_id, text) VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                # 放回待写列表，下次刷新时重试 (如数据库被检索进程短暂锁定)；持续失败时只报告一次
+                self._conn.rollback()
+                self._rows = (rows + self._rows)[-_MAX_PENDING_ROWS:]
+                if not self._write_failing:
+                    self._write_failing = True
+                    print(f"日志索引写入失败，记录将在下次刷新时重试: {e}", file=sys.stderr, flush=True)
+                return
+            if self._write_failing:
+                self._write_failing = False
+                print("日志索引写入已恢复。", file=sys.stderr, flush=True)
+        if time.time() - self._last_prune >= _PRUNE_INTERVAL_SECONDS:
+            self._last_prune = time.time()
+            try:
+                self._conn.execute("DELETE FROM logs WHERE ts < ?", (time.time() - self.retention_seconds,))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                print(f"日志索引清理失败: {e}", file=sys.stderr, flush=True)
+
+    def close(self):
+        if self._conn is not None:
+            self.flush_batch()
+            self._conn.close()
+            self._conn = None
+        super().close()
+
+
+def create_log_index_handler() -> LogIndexHandler | None:
+    """按配置创建索引处理器；未开启或当前 SQLite 不支持 FTS5/trigram 时返回 None。"""
+    if not settings.LOG_INDEX_CONFIG.get('enabled'):
+        return None
+    try:
+        return LogIndexHandler(settings.LOG_INDEX_DB, settings.LOG_INDEX_CONFIG.get('retention_days', 7))
+    except sqlite3.Error as e:
+        print(f"日志索引不可用 (需要支持 FTS5 trigram 的 SQLite): {e}", flush=True)
+        return None
+
+
+def search_logs(keyword: str, since: float = None, page: int = 1) -> tuple[list, bool]:
+    """
+    检索包含关键词的日志，按时间倒序分页。返回 (记录列表, 是否还有下一页)。
+    关键词不少于 3 个字符时走 trigram 索引，更短的关键词退化为 LIKE 扫描。
+    该函数会阻塞，应在线程中调用。
+    """
+    conn = sqlite3.connect(f"file:{settings.LOG_INDEX_DB}?mode=ro", uri=True)
+    try:
+        if len(keyword) >= 3:
+            condition, params = "logs MATCH ?", ['"' + keyword.replace('"', '""') + '"']
+        else:
+            escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condition = "(text LIKE ? ESCAPE '\\' OR title LIKE ? ESCAPE '\\')"
+            params = [f"%{escaped}%"] * 2
+        if since is not None:
+            condition += " AND ts >= ?"
+            params.append(since)
+        params += [PAGE_SIZE + 1, (page - 1) * PAGE_SIZE]
+        rows = conn.execute(
+            f"SELECT ts, type, title, account, msg_id, text FROM logs WHERE {condition} "
+            f"ORDER BY rowid DESC LIMIT ? OFFSET ?", params).fetchall()
+    finally:
+        conn.close()
+    return rows[:PAGE_SIZE], len(rows) > PAGE_SIZE
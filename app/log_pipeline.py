@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+非阻塞日志管线
+
+事件循环线程中的日志调用只把记录放进一个有界队列 (QueueHandler)，
+格式化、写文件、轮转与刷新全部在后台日志线程中完成：
+- 队列已满时直接丢弃新记录并计数，事件循环永不等待磁盘；
+- 文件/控制台处理器不再逐条 flush，而是在队列清空或达到刷新间隔时批量刷新；
+- 一个后台线程按记录所属的 logger 分发给各自的处理器 (app / raw_messages)。
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+
+class _BatchFlushMixin:
+    """emit 后不立即刷新，由日志线程调用 flush_batch 批量刷新。"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchedStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchedRotatingFileHandler(_BatchFlushMixin, logging.handlers.RotatingFileHandler):
+    """
+    自行累计已写入的字节数来判断是否轮转。
+    标准实现每条记录都会 seek/tell 文件，这会强制刷新缓冲区，使批量刷新失效。
+    计算长度时格式化出的文本会暂存，随后 emit 写入时直接复用，每条记录只格式化一次。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._size = None
+        self._formatted = None
+
+    def format(self, record) -> str:
+        cached, self._formatted = self._formatted, None
+        if cached is not None and cached[0] is record:
+            return cached[1]
+        return super().format(record)
+
+    def shouldRollover(self, record) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        if self._size is None:
+            self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        msg = self.format(record)
+        self._formatted = (record, msg)
+        length = len(f"{msg}{self.terminator}".encode(self.encoding or 'utf-8'))
+        if self._size + length >= self.maxBytes and self._size > 0:
+            self._size = length
+            return True
+        self._size += length
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            super().flush()
+        super().doRollover()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """队列已满时丢弃记录并计数，从不阻塞调用方。"""
+
+    def __init__(self, pipeline):
+        super().__init__(pipeline.queue)
+        self._pipeline = pipeline
+
+    def prepare(self, record):
+        # 消息文本 (包括延迟渲染的日志框) 留给日志线程格式化，这里只处理异常信息
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._pipeline.dropped += 1
+
+
+class LogPipeline:
+    def __init__(self):
+        self.queue = None
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._routes = {}
+        self._record_providers = []
+        self._flush_interval = 0.2
+        self._thread = None
+        self._sentinel = object()
+
+    def configure(self, max_size: int, flush_interval_ms: int):
+        """重新配置前会先停止正在运行的日志线程。"""
+        self.stop()
+        self.queue = queue.Queue(maxsize=max_size)
+        self._flush_interval = flush_interval_ms / 1000
+        self._routes.clear()
+
+    def attach(self, logger: logging.Logger, handlers: list):
+        """让 logger 只向队列写入，handlers 改由日志线程调用。"""
+        self._routes[logger.name] = list(handlers)
+        logger.addHandler(_DroppingQueueHandler(self))
+
+    def add_record_provider(self, provider):
+        """
+        注册一个在每次批量刷新时由日志线程调用的函数，返回需要补充输出的记录或 None。
+        用于汇总类记录：即使一段时间内没有新日志，也能按时输出。
+        """
+        if provider not in self._record_providers:
+            self._record_providers.append(provider)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="log-pipeline", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """投递结束标记并等待日志线程写完队列中剩余的记录。"""
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+        for handler in self._handlers():
+            handler.close()
+
+    def _handlers(self):
+        # 同一处理器可能挂在多个 logger 上 (如日志索引)，去重后再刷新/关闭
+        return list(dict.fromkeys(handler for handlers in self._routes.values() for handler in handlers))
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                record = self.queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                self._flush()
+                last_flush = time.monotonic()
+                continue
+            if record is self._sentinel:
+                self._flush()
+                return
+            self._handle(record)
+            if self.queue.empty() or time.monotonic() - last_flush >= self._flush_interval:
+                self._flush()
+                last_flush = time.monotonic()
+
+    def _handle(self, record):
+        for handler in self._routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _flush(self):
+        if self.dropped > self._reported_dropped and 'app' in self._routes:
+            record = logging.getLogger('app').makeRecord(
+                'app', logging.WARNING, __file__, 0,
+                f"[日志管线] 队列已满，已丢弃 {self.dropped - self._reported_dropped} 条日志 (累计 {self.dropped} 条)",
+                None, None)
+            self._reported_dropped = self.dropped
+            self._handle(record)
+        for provider in self._record_providers:
+            try:
+                record = provider()
+            except Exception:
+                continue
+            if record is not None:
+                self._handle(record)
+        for handler in self._handlers():
+            try:
+                if hasattr(handler, 'flush_batch'):
+                    handler.flush_batch()
+                else:
+                    handler.flush()
+            except Exception:
+                pass
+
+    def get_stats(self) -> dict:
+        return {
+            'queued': self.queue.qsize() if self.queue else 0,
+            'capacity': self.queue.maxsize if self.queue else 0,
+            'dropped': self.dropped,
+        }
+
+
+# 创建全局单例
+log_pipeline = LogPipeline()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+日志采样与限流
+
+按日志类型 (LogType 的开关名，如 msg_recv) 或日志标题 (如 "Redis-发布") 配置：
+- sampling: 每 N 条只保留 1 条；
+- rate_limits: 令牌桶 (每秒速率/突发上限)，超出部分直接丢弃。
+标题配置优先于类型配置。被抑制的条数按键累计，每隔 suppressed_summary_seconds
+由日志管线的后台线程输出一条汇总记录 (受 system_activity 开关控制)。配置每次从 settings.LOGGING_SWITCHES 读取，支持热更新。
+"""
+import threading
+import time
+
+from config import settings
+
+
+class _Bucket:
+    __slots__ = ('rate', 'burst', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LogThrottle:
+    def __init__(self):
+        self._buckets = {}
+        self._sample_counters = {}
+        self._suppressed = {}
+        # 计数在事件循环线程中累加，汇总在日志线程中取走，两者需互斥
+        self._suppressed_lock = threading.Lock()
+        self._last_summary = time.monotonic()
+
+    @staticmethod
+    def _rule(rules: dict, type_key: str, title: str):
+        if not rules:
+            return None, None
+        if title in rules:
+            return title, rules[title]
+        if type_key in rules:
+            return type_key, rules[type_key]
+        return None, None
+
+    def allow(self, type_key: str, title: str) -> bool:
+        """判断这条日志是否应当输出；被抑制时计数。"""
+        switches = settings.LOGGING_SWITCHES
+
+        key, every = self._rule(switches.get('sampling'), type_key, title)
+        if key is not None and int(every) > 1:
+            seen = self._sample_counters.get(key, 0)
+            self._sample_counters[key] = seen + 1
+            if seen % int(every):
+                self._count_suppressed(key)
+                return False
+
+        key, limit = self._rule(switches.get('rate_limits'), type_key, title)
+        if key is not None:
+            bucket = self._buckets.get(key)
+            if bucket is None or (bucket.rate, bucket.burst) != (float(limit['rate']), max(1, int(limit['burst']))):
+                bucket = self._buckets[key] = _Bucket(limit['rate'], limit['burst'])
+            if not bucket.take():
+                self._count_suppressed(key)
+                return False
+        return True
+
+    def _count_suppressed(self, key: str):
+        with self._suppressed_lock:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+
+    def pop_summary(self) -> dict | None:
+        """到达汇总周期且有被抑制的日志时，返回 {键: 条数} 并清零。"""
+        if not self._suppressed:
+            return None
+        now = time.monotonic()
+        if now - self._last_summary < settings.LOGGING_SWITCHES.get('suppressed_summary_seconds', 60):
+            return None
+        with self._suppressed_lock:
+            summary, self._suppressed = self._suppressed, {}
+        self._last_summary = now
+        return summary
+
+
+# 创建全局单例
+log_throttle = LogThrottle()
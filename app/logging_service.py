@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
 import pytz
 from collections import namedtuple
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 
-from telethon.utils import get_display_name
-from telethon.tl.types import Channel, Message, MessageService
+from telethon.tl.types import Message
 from telethon import events
 
+from app.log_pipeline import log_pipeline
+from app.log_throttle import log_throttle
+from app.message_cache import message_cache
+from app.sender_cache import sender_cache
 from config import settings
 
 # --- Log Type Definition ---
@@ -40,6 +45,9 @@ class TimezoneFormatter(logging.Formatter):
 
 
 LINE_WIDTH = 50
+_TOP_BORDER = "┌" + "─" * LINE_WIDTH
+_MIDDLE_BORDER = "├" + "─" * LINE_WIDTH
+_BOTTOM_BORDER = "└" + "─" * LINE_WIDTH
 
 def get_display_width(text: str) -> int:
     width = 0
@@ -50,43 +58,110 @@ def get_display_width(text: str) -> int:
             width += 1
     return width
 
-def format_and_log(log_type: LogType, title: str, data: dict, level=logging.INFO):
+# 日志字段名是有限的固定集合，显示宽度只需计算一次
+_key_display_width = lru_cache(maxsize=1024)(get_display_width)
+
+
+def render_log_box(title: str, data: dict) -> str:
+    """将标题与字段渲染为带边框的多行日志文本。"""
+    title_line = f"│ [ {title} ]"
+    body_lines = []
+    filtered_data = {str(k): v for k, v in data.items() if v is not None} if data else {}
+    if filtered_data:
+        max_key_width = max(_key_display_width(key) for key in filtered_data)
+        indent = " " * (max_key_width + 4)
+        for key, value in filtered_data.items():
+            padding = " " * (max_key_width - _key_display_width(key))
+            value_lines = str(value).split('\n')
+            body_lines.append(f"│ {key}{padding} : {value_lines[0]}")
+            for line in value_lines[1:]:
+                body_lines.append(f"│ {indent}{line}")
+
+    full_log_message = f"\n{_TOP_BORDER}\n{title_line}"
+    if body_lines:
+        full_log_message += f"\n{_MIDDLE_BORDER}\n" + "\n".join(body_lines)
+    full_log_message += f"\n{_BOTTOM_BORDER}"
+    return full_log_message
+
+
+class _LazyLogBox:
+    """日志记录的 msg：只有处理器真正格式化该记录时才渲染，且只渲染一次。"""
+    __slots__ = ('title', 'data', '_rendered')
+
+    def __init__(self, title: str, data: dict):
+        self.title = title
+        self.data = data
+        self._rendered = None
+
+    def __str__(self) -> str:
+        if self._rendered is None:
+            self._rendered = render_log_box(self.title, self.data)
+        return self._rendered
+
+
+def format_and_log(log_type: LogType, title: str, data: dict, level=None):
     """
     统一的日志格式化与输出函数。
-    它会检查配置中的开关，决定是否记录该类型的日志。
+    它会检查配置中的开关与日志级别，决定是否记录该类型的日志；
+    输出前再经过按类型/标题配置的采样与限流 (见 log_throttle)。
+    未指定 level 时，DEBUG 类型按 logging.DEBUG 记录，其余按 logging.INFO 记录。
+    结构化字段随记录传递 (record.log_type / log_title / log_data)，边框文本延迟到输出时才渲染。
     """
-    log_switch_name = log_type.value
-    if not settings.LOGGING_SWITCHES.get(log_switch_name, True):
+    if not settings.LOGGING_SWITCHES.get(log_type.value, True):
         return
+    if level is None:
+        level = logging.DEBUG if log_type is LogType.DEBUG else logging.INFO
 
     logger = logging.getLogger("app")
-    top_border = "┌" + "─" * LINE_WIDTH
-    middle_border = "├" + "─" * LINE_WIDTH
-    bottom_border = "└" + "─" * LINE_WIDTH
-    title_line = f"│ [ {title} ]"
-    body_lines = []
-    if data:
-        filtered_data = {k: v for k, v in data.items() if v is not None}
-        if not filtered_data:
-            body_lines = []
-        else:
-            max_key_width = max(get_display_width(str(key)) for key in filtered_data.keys()) if filtered_data else 0
-            for key, value in filtered_data.items():
-                current_key_width = get_display_width(key)
-                padding = " " * (max_key_width - current_key_width)
-                value_str = str(value)
-                value_lines = value_str.split('\n')
-                body_lines.append(f"│ {key}{padding} : {value_lines[0]}")
-                indent = " " * (max_key_width + 4)
-                for line in value_lines[1:]:
-                    body_lines.append(f"│ {indent}{line}")
-
-    full_log_message = f"\n{top_border}\n{title_line}"
-    if body_lines:
-        full_log_message += f"\n{middle_border}\n" + "\n".join(body_lines)
-    full_log_message += f"\n{bottom_border}"
+    if not logger.isEnabledFor(level):
+        return
+    if log_throttle.allow(log_type.value, title):
+        _emit(logger, level, log_type, title, data)
 
-    logger.log(level, full_log_message)
+
+def _emit(logger, level, log_type: LogType, title: str, data: dict):
+    # 记录会在日志线程中渲染，先对字段做浅拷贝，避免调用方随后修改
+    data = dict(data) if data else data
+    logger.log(level, _LazyLogBox(title, data),
+               extra={'log_type': log_type.value, 'log_title': title, 'log_data': data})
+
+
+def _suppression_summary_record():
+    """
+    [新增] 由日志线程在每次批量刷新时调用：到达汇总周期时输出被采样/限流抑制的日志条数。
+    放在管线中而不是 format_and_log 里，安静时段结束前也能按时输出汇总。
+    """
+    suppressed = log_throttle.pop_summary()
+    if not suppressed or not settings.LOGGING_SWITCHES.get(LogType.SYSTEM.value, True):
+        return None
+    title = "日志抑制汇总"
+    data = {key: f"抑制 {count} 条" for key, count in sorted(suppressed.items())}
+    return logging.getLogger("app").makeRecord(
+        "app", logging.WARNING, __file__, 0, _LazyLogBox(title, data), None, None,
+        extra={'log_type': LogType.SYSTEM.value, 'log_title': title, 'log_data': data})
+
+
+log_pipeline.add_record_provider(_suppression_summary_record)
+
+
+_pending_group_lookups = set()
+
+
+def _schedule_group_name_lookup(client, chat_id):
+    if chat_id is None or chat_id in _pending_group_lookups:
+        return
+    _pending_group_lookups.add(chat_id)
+
+    async def _lookup():
+        try:
+            entity = await client.client.get_entity(chat_id)
+            client.group_name_cache[int(chat_id)] = getattr(entity, 'title', f"ID:{chat_id}")
+        except Exception:
+            pass
+        finally:
+            _pending_group_lookups.discard(chat_id)
+
+    asyncio.create_task(_lookup())
 
 
 async def log_telegram_event(client, log_type: LogType, event, **kwargs):
@@ -116,19 +191,20 @@ async def log_telegram_event(client, log_type: LogType, event, **kwargs):
     # 2. 获取群组和话题信息
     chat_title = client.group_name_cache.get(event.chat_id)
     if not chat_title:
-        try:
-            entity = await client.client.get_entity(event.chat_id)
-            chat_title = getattr(entity, 'title', f"ID:{event.chat_id}")
+        # 优先使用更新自带的会话实体；仍未知时在后台补查，本次日志不等待
+        chat_title = getattr(getattr(event, 'chat', None), 'title', None)
+        if chat_title:
             client.group_name_cache[int(event.chat_id)] = chat_title
-        except Exception:
+        else:
             chat_title = f"ID:{event.chat_id}"
+            _schedule_group_name_lookup(client, event.chat_id)
     
     source_line = f"来源: {chat_title} ({event.chat_id})"
     
     topic_title = ""
     try:
         if hasattr(event, 'message') and hasattr(event.message, 'reply_to') and event.message.reply_to and hasattr(event.message.reply_to, 'forum_topic') and event.message.reply_to.forum_topic:
-            reply_to_msg = await event.get_reply_message()
+            reply_to_msg = await message_cache.get_reply_message(event.message)
             if hasattr(reply_to_msg, 'reply_to') and reply_to_msg.reply_to and hasattr(reply_to_msg.reply_to, 'topic_title'):
                  topic_title = reply_to_msg.reply_to.topic_title
     except Exception:
@@ -139,24 +215,22 @@ async def log_telegram_event(client, log_type: LogType, event, **kwargs):
         
     log_lines.append(source_line)
 
+    # [新增] 同一事件的结构化字段，供 JSONL 归档使用
+    raw_event = {
+        'time': event_time.isoformat(), 'type': log_type.name,
+        'chat_id': event.chat_id, 'chat': chat_title, 'topic': topic_title or None,
+    }
+
     # 3. 处理删除事件
     if log_type == LogType.MSG_DELETE:
         log_lines.append(f"被删除消息ID: {kwargs.get('deleted_ids', [])}")
+        raw_event['deleted_ids'] = list(kwargs.get('deleted_ids', []))
     
     # 4. 处理新消息和编辑事件
     else:
-        sender = None
-        if hasattr(event, 'get_sender'):
-             sender = await event.get_sender()
-        if sender is None and hasattr(event, 'sender_id') and event.sender_id:
-            try: 
-                sender = await client.client.get_entity(event.sender_id)
-            except Exception:
-                sender = None
-        
-        sender_name = get_display_name(sender) if sender else "未知来源"
-        if isinstance(sender, (MessageService, Channel)) and hasattr(sender, 'title'):
-             sender_name = f"频道/群组事件 ({sender.title})"
+        # 发送者名称取自缓存 (由更新自带的实体填充)，缺失时后台补查，不阻塞日志
+        sender_name = sender_cache.get_name(client, getattr(event, 'sender_id', None),
+                                            getattr(event, 'sender', None)) or "未知来源"
 
         log_lines.append(f"用户: {sender_name} ({getattr(event, 'sender_id', 'N/A')})")
         
@@ -167,7 +241,14 @@ async def log_telegram_event(client, log_type: LogType, event, **kwargs):
         content = kwargs.get('command', getattr(event, 'text', '(无文本内容)'))
         log_lines.append(f"内容:\n{content}")
 
-    raw_logger.info("\n".join(log_lines) + "\n" + "─" * 50)
+        raw_event.update({
+            'msg_id': getattr(event, 'id', None), 'is_edit': isinstance(event, events.MessageEdited.Event),
+            'sender_id': getattr(event, 'sender_id', None), 'sender': sender_name,
+            'reply_to': event.reply_to_msg_id if getattr(event, 'is_reply', False) else None,
+            'text': content,
+        })
+
+    raw_logger.info("\n".join(log_lines) + "\n" + "─" * 50, extra={'raw_event': raw_event})
     
     # --- 格式化日志 (format_and_log) ---
     log_switch_name = log_type.value
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+最近消息的 LRU 缓存
+
+以 (chat_id, msg_id) 为键保存最近发送和收到的消息。被回复的消息绝大多数是
+刚刚发出或收到的，解析"回复至哪条消息"时先查缓存，未命中才调用 get_reply_message。
+"""
+from collections import OrderedDict
+
+from config import settings
+
+
+class MessageCache:
+    def __init__(self, maxsize: int = 2000):
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, message):
+        if message is None or getattr(message, 'chat_id', None) is None:
+            return
+        key = (message.chat_id, message.id)
+        self._entries[key] = message
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, chat_id: int, msg_id: int):
+        message = self._entries.get((chat_id, msg_id))
+        if message is not None:
+            self._entries.move_to_end((chat_id, msg_id))
+        return message
+
+    async def get_reply_message(self, message):
+        """返回 message 所回复的消息，优先取缓存；未命中时请求一次并写入缓存。"""
+        if message is None or not getattr(message, 'is_reply', False):
+            return None
+        cached = self.get(message.chat_id, message.reply_to_msg_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        reply_message = await message.get_reply_message()
+        self.put(reply_message)
+        return reply_message
+
+    def get_stats(self) -> dict:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# 创建全局单例
+message_cache = MessageCache(settings.PERFORMANCE_CONFIG.get('message_cache_size', 2000))
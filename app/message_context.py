@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+统一的消息接入层
+
+每条进入的消息只在接入时构建一次 MessageContext (文本、发送者、群组、@提及标记、
+被回复消息、事件指纹等)，再由 MessageHub 分发给订阅了该类消息的插件。
+各插件不再各自注册 Telethon 处理器、重复计算显示名或重复请求被回复的消息。
+"""
+import asyncio
+import logging
+
+from telethon import events
+from telethon.utils import get_display_name
+
+from app import event_parsers
+from app.keyword_matcher import KeywordMatcher
+from app.message_cache import message_cache
+from app.logging_service import LogType, format_and_log
+
+
+class _Identity:
+    """本账号用于识别 @提及 的字符串，登录后计算一次。"""
+    __slots__ = ('id', 'at_username', 'display_name', 'at_display_name')
+
+    def __init__(self, me):
+        self.id = me.id
+        self.at_username = f"@{me.username}" if me.username else None
+        self.display_name = get_display_name(me) or None
+        self.at_display_name = f"@{self.display_name}" if self.display_name else None
+
+
+class MessageContext:
+    """一条消息的标准化视图，所有订阅者共享同一个实例。"""
+
+    def __init__(self, message, identity: _Identity, event=None, is_edit: bool = False, is_awaited_by_task: bool = False):
+        self.event = event
+        self.message = message
+        self.text = message.text or ""
+        self.chat_id = getattr(event, 'chat_id', None) if event is not None else message.chat_id
+        self.sender_id = getattr(event, 'sender_id', None) if event is not None else message.sender_id
+        self.is_edit = is_edit
+        self.is_incoming = not getattr(message, 'out', False)
+        self.is_private = bool(getattr(message, 'is_private', False))
+        self.is_group = bool(getattr(message, 'is_group', False))
+        self.is_reply = bool(getattr(message, 'is_reply', False))
+        self.reply_to_msg_id = getattr(message, 'reply_to_msg_id', None) if self.is_reply else None
+        self.is_awaited_by_task = is_awaited_by_task
+        self.identity = identity
+
+        # 严格提及: 出现 @用户名 或 @显示名
+        self.is_mentioning_me = bool(identity) and any(
+            token and token in self.text for token in (identity.at_username, identity.at_display_name))
+        # 宽松提及: 额外允许不带 @ 的显示名
+        self.contains_my_name = self.is_mentioning_me or bool(
+            identity and identity.display_name and identity.display_name in self.text)
+
+        self._reply_message_task = None
+        self._fingerprints = None
+
+    @property
+    def fingerprints(self) -> list:
+        """匹配到的事件解析函数，首次访问时计算。"""
+        if self._fingerprints is None:
+            self._fingerprints = event_parsers.match_fingerprints(self.text)
+        return self._fingerprints
+
+    async def get_reply_message(self):
+        """被回复的消息，多个订阅者并发访问时也只请求一次。"""
+        if not self.is_reply:
+            return None
+        if self._reply_message_task is None:
+            self._reply_message_task = asyncio.ensure_future(message_cache.get_reply_message(self.message))
+        try:
+            return await asyncio.shield(self._reply_message_task)
+        except Exception:
+            return None
+
+    async def is_reply_to(self, user_id) -> bool:
+        reply_message = await self.get_reply_message()
+        return bool(reply_message) and str(reply_message.sender_id) == str(user_id)
+
+
+class _Subscription:
+    __slots__ = ('handler', 'name', 'chats', 'senders', 'keywords', 'incoming', 'new_messages', 'edits')
+
+    def __init__(self, handler, name, chats, senders, keywords, incoming, new_messages, edits):
+        self.handler = handler
+        self.name = name
+        self.chats = frozenset(int(c) for c in chats) if chats is not None else None
+        self.senders = frozenset(int(s) for s in senders) if senders is not None else None
+        self.keywords = frozenset(k for k in keywords if k) if keywords else frozenset()
+        self.incoming = incoming
+        self.new_messages = new_messages
+        self.edits = edits
+
+    def accepts(self, is_edit: bool, is_incoming: bool, sender_id, found_keywords: set) -> bool:
+        if is_edit and not self.edits: return False
+        if not is_edit and not self.new_messages: return False
+        if self.incoming is not None and self.incoming != is_incoming: return False
+        if self.senders is not None and sender_id not in self.senders: return False
+        return self.keywords <= found_keywords
+
+
+class MessageHub:
+    """
+    消息路由表。订阅者声明廉价的前置过滤条件 (会话、发送者、必含关键词、收/发方向、新消息/编辑)，
+    分发时先按会话索引取候选，再用一次关键词扫描得到命中集合，只有条件全部满足的订阅者才会被唤醒，
+    且只有存在这样的订阅者时才构建 MessageContext。
+    """
+
+    def __init__(self):
+        self._subscriptions = []
+        self._identity = None
+        self._by_chat = {}
+        self._any_chat = []
+        self._matcher = KeywordMatcher(())
+
+    def set_identity(self, me):
+        self._identity = _Identity(me) if me else None
+
+    def subscribe(self, handler, name: str = None, chats=None, senders=None, keywords=None,
+                  incoming: bool | None = True, new_messages: bool = True, edits: bool = False):
+        """
+        订阅消息。handler 为 async def handler(ctx: MessageContext)。
+        - chats / senders: 只接收这些会话 / 发送者的消息；None 表示不限。
+        - keywords: 文本中必须全部出现的关键词。
+        - incoming: True 只收别人发的，False 只收自己发的，None 不限。
+        """
+        sub = _Subscription(handler, name or getattr(handler, '__qualname__', repr(handler)),
+                            chats, senders, keywords, incoming, new_messages, edits)
+        self._subscriptions.append(sub)
+        self._rebuild_index()
+
+    def clear(self):
+        """插件热重载前调用，移除全部订阅。"""
+        self._subscriptions.clear()
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        by_chat, any_chat = {}, []
+        for sub in self._subscriptions:
+            if sub.chats is None:
+                any_chat.append(sub)
+            else:
+                for chat_id in sub.chats:
+                    by_chat.setdefault(chat_id, []).append(sub)
+        self._by_chat, self._any_chat = by_chat, any_chat
+        self._matcher = KeywordMatcher(k for sub in self._subscriptions for k in sub.keywords)
+
+    def route(self, chat_id, is_edit: bool, is_incoming: bool, sender_id, text: str) -> list:
+        """返回前置过滤条件全部满足的订阅者。"""
+        candidates = self._by_chat.get(chat_id, [])
+        if self._any_chat:
+            candidates = candidates + self._any_chat
+        if not candidates:
+            return []
+        found_keywords = self._matcher.find(text) if any(sub.keywords for sub in candidates) else set()
+        return [sub for sub in candidates if sub.accepts(is_edit, is_incoming, sender_id, found_keywords)]
+
+    def build_context(self, event) -> MessageContext:
+        return MessageContext(event.message, self._identity, event=event,
+                              is_edit=isinstance(event, events.MessageEdited.Event))
+
+    def context_from_message(self, message, is_awaited_by_task: bool = False) -> MessageContext:
+        """为任务主动获取到的消息构建上下文 (如闯塔的最终战报)。"""
+        return MessageContext(message, self._identity, is_awaited_by_task=is_awaited_by_task)
+
+    async def dispatch_event(self, event):
+        """接入层入口：先路由，只有存在匹配的订阅者时才构建上下文并分发。"""
+        targets = self.route(event.chat_id, isinstance(event, events.MessageEdited.Event),
+                             not event.out, event.sender_id, event.message.text or "")
+        if targets:
+            ctx = self.build_context(event)
+            await asyncio.gather(*(self._run(sub, ctx) for sub in targets))
+
+    @staticmethod
+    async def _run(sub: _Subscription, ctx: MessageContext):
+        try:
+            await sub.handler(ctx)
+        except Exception as e:
+            format_and_log(LogType.ERROR, "消息订阅者异常", {
+                '订阅者': sub.name, '消息ID': ctx.message.id, '错误': str(e)
+            }, level=logging.ERROR)
@@ -57,7 +57,9 @@ async def update_inventory_cache(force_run=False):
     client = app.client
     format_and_log(LogType.TASK, "刷新背包", {'阶段': '任务开始', '强制执行': force_run})
     try:
-        _sent, reply = await client.send_game_command_request_response(game_adaptor.get_inventory())
+        # 手动/纠错校准必须拿到游戏的最新回复，不能用缓存
+        _sent, reply = await client.send_game_command_request_response(game_adaptor.get_inventory(),
+                                                                        use_cache=not force_run)
         inventory = parse_inventory_text(reply)
         if inventory:
             await inventory_manager.set_inventory(inventory)
@@ -86,15 +88,7 @@ async def trigger_chuang_ta(force_run=False):
 
         # [核心修复] 主动将获取到的最终结果交给事件处理器
         from app.plugins.game_event_handler import handle_game_report
-        # 模拟一个 event 对象
-        class FakeEvent:
-            def __init__(self, message):
-                self.message = message
-                self.text = message.text
-                self.is_reply = False # 这是一个编辑事件，不是回复
-                self.sender_id = message.sender_id
-
-        await handle_game_report(FakeEvent(final_reply))
+        await handle_game_report(client.message_hub.context_from_message(final_reply, is_awaited_by_task=True))
         format_and_log(LogType.TASK, "自动闯塔", {'阶段': '成功', '详情': '已将最终结果主动上报至事件总线。'})
 
     finally:
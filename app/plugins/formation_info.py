@@ -66,7 +66,7 @@ async def trigger_update_formation(force_run=False):
     format_and_log(LogType.TASK, "查询阵法", {'阶段': '任务开始', '强制执行': force_run})
 
     try:
-        _sent, reply = await client.send_game_command_request_response(command)
+        _sent, reply = await client.send_game_command_request_response(command, use_cache=not force_run)
         
         formation_data = _parse_formation_text(reply.text)
 
@@ -2,9 +2,6 @@
 import logging
 import re
 
-from telethon import events
-from telethon.utils import get_display_name
-
 from app.constants import GAME_EVENTS_CHANNEL
 from app.context import get_application
 from app.logging_service import LogType, format_and_log
@@ -25,44 +22,39 @@ async def _handle_parsing_error(client, event_name: str, raw_text: str):
         f"请根据以下原文修正解析逻辑：\n`{raw_text}`"
     )
 
-async def handle_game_report(event):
+async def handle_game_report(ctx):
     app = get_application()
     client = app.client
     
-    if not hasattr(event, 'text') or not event.text:
+    if not ctx.text:
         return
 
     # [核心修复] 首先，判断这个事件是否由一个正在等待的任务（如闯塔）主动上报的。
-    # 我们通过检查 event 对象是否有一个特殊的 `is_awaited_by_task` 标志来判断。
-    is_awaited_by_task = getattr(event, 'is_awaited_by_task', False)
+    is_awaited_by_task = ctx.is_awaited_by_task
 
-    # 检查消息是否@我
-    my_display_name = get_display_name(client.me)
-    is_mentioning_me = (client.me.username and f"@{client.me.username}" in event.text) or \
-                       (my_display_name and my_display_name in event.text)
+    # 检查消息是否@我 (接入层已预先计算)
+    is_mentioning_me = ctx.contains_my_name
 
-    # 检查消息是否直接回复我
+    # 检查消息是否直接回复我 (被回复的消息在接入层只请求一次)
     original_message = None
     is_reply_to_me = False
-    if hasattr(event, 'is_reply') and event.is_reply:
-        try:
-            reply_to_msg = await event.get_reply_message()
-            if reply_to_msg and reply_to_msg.sender_id == client.me.id:
-                is_reply_to_me = True
-                original_message = reply_to_msg
-        except Exception:
-            pass
+    if ctx.is_reply:
+        reply_to_msg = await ctx.get_reply_message()
+        if reply_to_msg and reply_to_msg.sender_id == client.me.id:
+            is_reply_to_me = True
+            original_message = reply_to_msg
     
     # 只有当事件与我明确相关时，才继续处理
     if not is_awaited_by_task and not is_mentioning_me and not is_reply_to_me:
         return
 
-    text = event.text
+    text = ctx.text
     event_payload = None
 
     try:
         original_message_text = original_message.text if original_message else None
-        event_payload = event_parsers.dispatch_and_parse(text, original_message_text=original_message_text)
+        event_payload = event_parsers.dispatch_and_parse(text, original_message_text=original_message_text,
+                                                         fingerprints=ctx.fingerprints)
         
         if not event_payload and is_reply_to_me:
             if original_message_text and ".下架" in original_message_text and "从万宝楼下架" in text:
@@ -79,5 +71,4 @@ async def handle_game_report(event):
 
 
 def initialize(app):
-    app.client.client.on(events.NewMessage(incoming=True, chats=settings.GAME_GROUP_IDS))(handle_game_report)
-    app.client.client.on(events.MessageEdited(incoming=True, chats=settings.GAME_GROUP_IDS))(handle_game_report)
+    app.register_message_handler(handle_game_report, chats=settings.GAME_GROUP_IDS, edits=True)
@@ -2,8 +2,6 @@
 import logging
 import shlex
 
-from telethon import events
-
 from app.context import get_application
 from app.logging_service import LogType, format_and_log
 from app.utils import get_display_width
@@ -78,10 +76,11 @@ async def _handle_help_command(event, parts):
     help_lines.append(f"**使用 `{prefix}获取帮助 <指令名>` 查看具体用法。**")
     await client.reply_to_admin(event, "\n".join(help_lines))
 
-async def execute_command(event):
+async def execute_command(ctx):
     app = get_application()
     client = app.client
-    text = event.text.strip()
+    event = ctx.event
+    text = ctx.text.strip()
     
     used_prefix = next((p for p in settings.COMMAND_PREFIXES if text.startswith(p)), None)
     if not used_prefix: return
@@ -107,33 +106,32 @@ async def execute_command(event):
     if not command_info or not command_info.get("handler"):
         return
 
-    is_admin_sender = str(event.sender_id) == str(settings.ADMIN_USER_ID)
+    is_admin_sender = str(ctx.sender_id) == str(settings.ADMIN_USER_ID)
     my_id = str(client.me.id)
 
     can_execute = False
     
     if is_admin_sender:
-        if event.is_private:
+        if ctx.is_private:
             can_execute = True
-        elif event.is_group:
-            if event.is_reply:
-                reply_to_msg = await event.get_reply_message()
-                if reply_to_msg and str(reply_to_msg.sender_id) == my_id:
+        elif ctx.is_group:
+            if ctx.is_reply:
+                if await ctx.is_reply_to(my_id):
                     can_execute = True
             else:
                 can_execute = True
-    elif str(event.sender_id) == my_id and event.is_private and str(event.chat_id) == my_id:
+    elif str(ctx.sender_id) == my_id and ctx.is_private and str(ctx.chat_id) == my_id:
          can_execute = True
 
 
     if can_execute:
-        is_self_command = str(event.sender_id) == my_id
+        is_self_command = str(ctx.sender_id) == my_id
         if is_admin_sender or is_self_command:
-            client._schedule_message_deletion(event.message, settings.AUTO_DELETE.get('delay_admin_command'), "管理员或自身指令原文")
+            client._schedule_message_deletion(ctx.message, settings.AUTO_DELETE.get('delay_admin_command'), "管理员或自身指令原文")
 
         noisy_commands = settings.BROADCAST_CONFIG.get('noisy_commands', [])
         is_main_bot = my_id == str(settings.ADMIN_USER_ID)
-        is_broadcast_in_group = is_admin_sender and event.is_group and not event.is_reply
+        is_broadcast_in_group = is_admin_sender and ctx.is_group and not ctx.is_reply
         if is_broadcast_in_group and cmd_name in noisy_commands and not is_main_bot:
             format_and_log(LogType.TASK, "指令忽略", {'指令': cmd_name, '执行者': my_id, '原因': '非主控号，避免群内刷屏'})
             return
@@ -145,7 +143,8 @@ async def execute_command(event):
 def initialize(app):
     client = app.client
     
-    listen_chats = [int(settings.ADMIN_USER_ID), 'me']
+    # 'me' (收藏夹) 在接入层中即为本账号ID
+    listen_chats = [int(settings.ADMIN_USER_ID), client.me.id]
     if settings.CONTROL_GROUP_ID:
         listen_chats.append(int(settings.CONTROL_GROUP_ID))
     
@@ -159,7 +158,7 @@ def initialize(app):
         aliases=["help", "菜单", "menu", "帮助"]
     )
 
-    @client.client.on(events.NewMessage(chats=listen_chats))
-    async def unified_command_handler(event):
-        await execute_command(event)
+    # 只有管理员或本账号发出的消息才可能是可执行的指令
+    app.register_message_handler(execute_command, name="unified_command_handler", chats=listen_chats,
+                                 senders=[int(settings.ADMIN_USER_ID), client.me.id], incoming=None)
 
@@ -29,7 +29,9 @@ async def trigger_garden_check(force_run=False):
     client = get_application().client
     format_and_log(LogType.TASK, "小药园", {'阶段': '任务开始', '强制执行': force_run})
 
-    _sent, initial_reply = await client.send_game_command_request_response(game_adaptor.huangfeng_garden())
+    # 地块状态会随时间变化 (成熟、生虫等)，且决定后续操作，始终实时查询
+    _sent, initial_reply = await client.send_game_command_request_response(game_adaptor.huangfeng_garden(),
+                                                                           use_cache=False)
     format_and_log(LogType.TASK, "小药园", {'阶段': '获取初始状态成功', '原始返回': initial_reply.text.replace('\n', ' ')})
 
     initial_status = _parse_garden_status(initial_reply)
@@ -2,7 +2,6 @@
 import logging
 import random
 import pytz
-import asyncio
 import re
 from datetime import datetime, timedelta
 from config import settings
@@ -32,7 +31,8 @@ async def trigger_learn_recipes(force_run=False):
 
     # --- 第一阶段：同步权威知识库 ---
     try:
-        _sent_msg, reply = await client.send_game_command_request_response(game_adaptor.get_crafting_list())
+        _sent_msg, reply = await client.send_game_command_request_response(game_adaptor.get_crafting_list(),
+                                                                           use_cache=not force_run)
         
         # [核心修复 v3.1] 使用新的正则表达式来匹配 "- **物品名** (来自: ...)" 格式
         # 这个表达式会查找以"- "开头，后跟两个星号，然后捕获直到下一个星号对的所有内容
@@ -76,47 +76,50 @@ async def trigger_learn_recipes(force_run=False):
         
     format_and_log(LogType.TASK, "自动学习", {'阶段': '开始学习', '待学列表': str(recipes_to_learn)})
 
-    # --- 第三阶段：执行与即时记录 ---
-    jitter_config = settings.TASK_JITTER['learn_recipes']
+    # --- 第三阶段：流水线执行与即时记录 ---
     newly_learned_in_session = False
-    
-    for recipe in recipes_to_learn:
-        try:
-            format_and_log(LogType.TASK, "自动学习", {'阶段': '发送学习指令', '物品': recipe})
-            # 发送学习指令时，使用【丹方/图纸全名】
-            command = game_adaptor.learn_recipe(recipe)
-            _sent_learn, reply_learn = await client.send_game_command_request_response(command, timeout=10)
-            
-            if "成功领悟了它的炼制之法" in reply_learn.text:
-                # 学习成功后，将【物品名称】加入内存中的权威列表
-                base_item_name = recipe.replace("图纸", "").replace("丹方", "").strip()
-                format_and_log(LogType.TASK, "自动学习-知识库更新", {'阶段': '学习成功', '物品': base_item_name})
-                learned_from_command.add(base_item_name)
-                newly_learned_in_session = True
-            
-            elif "你的储物袋中没有此物可供学习" in reply_learn.text or f"你的储物袋中没有【{recipe}】" in reply_learn.text:
-                format_and_log(LogType.WARNING, "自动学习", {'阶段': '缓存不一致', '问题': f"缓存显示有 {recipe}，但实际没有。"})
-                await client.send_admin_notification(f"⚠️ **缓存不一致警告 (自动学习)**\n\n- **问题**: 缓存显示有`{recipe}`，但实际背包中没有。\n- **操作**: 正在触发一次背包强制同步以进行自我修正。")
-                await update_inventory_cache(force_run=True)
-                format_and_log(LogType.TASK, "自动学习", {'阶段': '任务中止', '原因': '已触发背包校准，等待下个周期。'})
-                break
-
-            else:
-                 format_and_log(LogType.WARNING, "自动学习", {'阶段': '学习未成功或已学会', '物品': recipe, '返回': reply_learn.text.strip()})
-
-        except CommandTimeoutError:
+    missing_recipes = []
+    commands = [game_adaptor.learn_recipe(recipe) for recipe in recipes_to_learn]
+    format_and_log(LogType.TASK, "自动学习", {'阶段': '发送学习指令', '物品数量': len(commands)})
+    # 发送学习指令时，使用【丹方/图纸全名】；各指令互不依赖，连续发送并并发等待回复
+    results = await client.send_game_commands_pipelined(commands, timeout=10)
+
+    for recipe, result in zip(recipes_to_learn, results):
+        if isinstance(result, CommandTimeoutError):
             format_and_log(LogType.TASK, "自动学习", {'阶段': '学习超时', '物品': recipe}, level=logging.WARNING)
             continue
-        finally:
-            delay = random.uniform(jitter_config['min'], jitter_config['max'])
-            await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            format_and_log(LogType.ERROR, "自动学习", {'阶段': '学习异常', '物品': recipe, '错误': str(result)})
+            continue
+
+        _sent_learn, reply_learn = result
+        if "成功领悟了它的炼制之法" in reply_learn.text:
+            # 学习成功后，将【物品名称】加入内存中的权威列表
+            base_item_name = recipe.replace("图纸", "").replace("丹方", "").strip()
+            format_and_log(LogType.TASK, "自动学习-知识库更新", {'阶段': '学习成功', '物品': base_item_name})
+            learned_from_command.add(base_item_name)
+            newly_learned_in_session = True
+
+        elif "你的储物袋中没有此物可供学习" in reply_learn.text or f"你的储物袋中没有【{recipe}】" in reply_learn.text:
+            # 所有指令均已发出并收到回复，继续处理其余结果，背包校准在循环结束后统一进行一次
+            format_and_log(LogType.WARNING, "自动学习", {'阶段': '缓存不一致', '问题': f"缓存显示有 {recipe}，但实际没有。"})
+            missing_recipes.append(recipe)
+
+        else:
+             format_and_log(LogType.WARNING, "自动学习", {'阶段': '学习未成功或已学会', '物品': recipe, '返回': reply_learn.text.strip()})
     
+    if missing_recipes:
+        missing_text = "、".join(f"`{recipe}`" for recipe in missing_recipes)
+        await client.send_admin_notification(f"⚠️ **缓存不一致警告 (自动学习)**\n\n- **问题**: 缓存显示有{missing_text}，但实际背包中没有。\n- **操作**: 正在触发一次背包强制同步以进行自我修正。")
+        await update_inventory_cache(force_run=True)
+        format_and_log(LogType.TASK, "自动学习", {'阶段': '背包校准', '原因': f'{len(missing_recipes)} 件物品缓存不一致，已强制同步背包。'})
+
     if newly_learned_in_session:
         # 任务结束时，将更新后的权威列表存回数据库
         await data_manager.save_value(STATE_KEY_LEARNED_RECIPES, sorted(list(learned_from_command)))
         format_and_log(LogType.TASK, "自动学习", {'阶段': '任务完成', '详情': '已将新学配方持久化至知识库。'})
     else:
-        format_and_log(LogType.TASK, "自动学习", {'阶段': '任务完成', '详情': '所有可学物品均已尝试或任务已中止。'})
+        format_and_log(LogType.TASK, "自动学习", {'阶段': '任务完成', '详情': '所有可学物品均已尝试，本次没有新学会的配方。'})
 
 
 async def check_learn_recipes_startup():
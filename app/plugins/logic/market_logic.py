@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 import re
-import asyncio
-import random
 from app import game_adaptor
 from app.logging_service import LogType, format_and_log
 
@@ -13,7 +11,8 @@ async def logic_clear_my_stall(client) -> str:
     format_and_log(LogType.TASK, "清理货摊", {'阶段': '开始查询'})
     
     # 1. 发送指令并等待直接回复
-    _sent, reply = await client.send_game_command_request_response(game_adaptor.get_my_stall())
+    # 货摊可能已被他人购买而变化，下架前需要实时结果
+    _sent, reply = await client.send_game_command_request_response(game_adaptor.get_my_stall(), use_cache=False)
     reply_text = reply.text
     
     # 2. 检查货摊是否为空
@@ -29,23 +28,22 @@ async def logic_clear_my_stall(client) -> str:
     
     format_and_log(LogType.TASK, "清理货摊", {'阶段': '解析成功', '待下架ID': str(listing_ids)})
     
-    # 4. 逐一下架
+    # 4. 流水线下架：连续发送所有下架指令，并发等待各自的回复
+    delist_commands = [game_adaptor.unlist_item(item_id) for item_id in listing_ids]
+    results = await client.send_game_commands_pipelined(delist_commands)
+
     delisted_count = 0
     failed_ids = []
-    
-    for item_id in listing_ids:
-        try:
-            delist_command = game_adaptor.unlist_item(item_id)
-            await client.send_game_command_fire_and_forget(delist_command)
-            delisted_count += 1
-            await asyncio.sleep(random.uniform(2, 4))
-        except Exception as e:
+    for item_id, result in zip(listing_ids, results):
+        if isinstance(result, Exception):
             failed_ids.append(item_id)
-            format_and_log(LogType.ERROR, "清理货摊-单项失败", {'ID': item_id, '错误': str(e)})
+            format_and_log(LogType.ERROR, "清理货摊-单项失败", {'ID': item_id, '错误': str(result)})
+        else:
+            delisted_count += 1
 
     # 5. 生成并返回最终报告
     report_lines = [f"✅ **清理完成**：共尝试下架 **{len(listing_ids)}** 件物品。"]
-    report_lines.append(f"- **成功发送指令**: {delisted_count} 次")
+    report_lines.append(f"- **收到回复**: {delisted_count} 次")
     if failed_ids:
         report_lines.append(f"- **失败**: {len(failed_ids)} 次 (ID: `{', '.join(failed_ids)}`)")
         
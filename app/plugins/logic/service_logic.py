@@ -1,10 +1,19 @@
 # -*- coding: utf-8 -*-
 import sys
+import re
+import time
 import asyncio
 import pytz
 from datetime import datetime
 from config import settings
 from app.context import get_application, get_scheduler
+from app.latency_stats import latency_stats
+from app.log_index import PAGE_SIZE, search_logs
+from app.log_pipeline import log_pipeline
+from app.message_cache import message_cache
+from app.query_cache import query_cache
+from app.rate_limiter import rate_limiter
+from app.event_dispatcher import redis_task_executor
 
 async def logic_restart_service() -> str:
     """安排服务重启"""
@@ -72,3 +81,79 @@ async def logic_reload_tasks() -> str:
         await asyncio.gather(*(check() for check in app.startup_checks if check))
         
     return "✅ 所有周期任务已根据最新配置重新加载。"
+
+async def logic_get_performance_stats() -> str:
+    """汇总指令延迟分位数、限流器与查询缓存的运行状态"""
+    reply_text = "📈 **性能统计**\n\n**指令延迟 (p50 / p95 / p99)**:"
+    reply_text += "\n" + latency_stats.render()
+
+    limiter_stats = rate_limiter.get_stats()
+    if limiter_stats:
+        reply_text += "\n\n**限流器**:"
+        for kind, data in limiter_stats.items():
+            reply_text += (f"\n- `{kind}`: 速率 {data['rate']}/{data['base_rate']} 每秒, "
+                           f"受限 {data['throttled_count']} 次 ({data['throttled_seconds']}s), FloodWait {data['flood_wait_count']} 次")
+
+    cache_stats = query_cache.get_stats()
+    reply_text += f"\n\n**查询缓存**: 条目 {cache_stats['entries']}, 命中 {cache_stats['hits']}, 未命中 {cache_stats['misses']}"
+    cache_stats = message_cache.get_stats()
+    reply_text += f"\n**消息缓存**: 条目 {cache_stats['entries']}, 命中 {cache_stats['hits']}, 未命中 {cache_stats['misses']}"
+
+    log_stats = log_pipeline.get_stats()
+    reply_text += f"\n**日志队列**: 积压 {log_stats['queued']}/{log_stats['capacity']}, 丢弃 {log_stats['dropped']}"
+
+    executor_stats = redis_task_executor.get_stats()
+    reply_text += (f"\n\n**Redis 任务**: 排队 {executor_stats['pending']}/{executor_stats['capacity']}, "
+                   f"峰值 {executor_stats['max_depth']}, 丢弃 {executor_stats['dropped']}, "
+                   f"合并 {executor_stats['coalesced']}, 阻塞读取 {executor_stats['blocked_seconds']}s")
+    for task_type, lane in executor_stats['lanes'].items():
+        reply_text += (f"\n- `{task_type}`: 排队 {lane['queued']}, 执行中 {lane['running']}/{lane['concurrency']}, "
+                       f"完成 {lane['processed']}, 失败 {lane['failed']}")
+    return reply_text
+
+
+_TIME_RANGE_UNITS = {'m': 60, '分钟': 60, 'h': 3600, '小时': 3600, 'd': 86400, '天': 86400}
+
+
+def _parse_time_range(text: str) -> int | None:
+    """将 30m / 2h / 1d (或 30分钟 / 2小时 / 1天) 解析为秒数。"""
+    match = re.fullmatch(r"(\d+)\s*(m|h|d|分钟|小时|天)", text.strip().lower())
+    return int(match.group(1)) * _TIME_RANGE_UNITS[match.group(2)] if match else None
+
+
+async def logic_search_logs(keyword: str, options: list) -> str:
+    """在本地日志索引中检索关键词，options 可包含时间范围与页码。"""
+    if not settings.LOG_INDEX_CONFIG.get('enabled'):
+        return "ℹ️ 日志索引未开启，请在配置中设置 `log_index.enabled: true` 后重启。"
+
+    since_seconds, page = None, 1
+    for option in options:
+        if option.isdigit():
+            page = max(1, int(option))
+        elif (seconds := _parse_time_range(option)) is not None:
+            since_seconds = seconds
+        else:
+            return f"❌ 无法识别的参数: `{option}` (时间范围示例: `30m` / `2h` / `1d`，页码为数字)"
+
+    started = time.perf_counter()
+    since = time.time() - since_seconds if since_seconds else None
+    try:
+        rows, has_more = await asyncio.to_thread(search_logs, keyword, since, page)
+    except Exception as e:
+        return f"❌ 查询日志索引失败: `{e}`"
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not rows:
+        return f"🔍 未找到包含 `{keyword}` 的日志 (第 {page} 页)。"
+
+    tz = pytz.timezone(settings.TZ)
+    reply_text = f"🔍 **日志检索**: `{keyword}` (第 {page} 页，每页 {PAGE_SIZE} 条，耗时 {elapsed_ms:.0f}ms)\n"
+    for ts, log_type, title, account, msg_id, text in rows:
+        stamp = datetime.fromtimestamp(ts, tz).strftime('%m-%d %H:%M:%S')
+        header = f"`{stamp}` **{log_type}**" + (f" [{title}]" if title else "") + (f" ID:{msg_id}" if msg_id else "")
+        body = text if len(text) <= 300 else text[:300] + "…"
+        reply_text += f"\n{header}\n```\n{body}\n```"
+    if has_more:
+        next_options = " ".join([o for o in options if not o.isdigit()] + [str(page + 1)])
+        reply_text += f"\n下一页: `,查日志 {keyword} {next_options}`"
+    return reply_text
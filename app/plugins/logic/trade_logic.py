@@ -2,8 +2,7 @@
 import json
 import logging
 import re
-import asyncio
-from datetime import datetime, timezone
+from datetime import datetime
 
 from app import game_adaptor, redis_client
 from app.constants import TASK_CHANNEL
@@ -126,14 +125,8 @@ async def execute_synced_unlisting_task(app, **payload):
 
     try:
         go_time = datetime.fromisoformat(go_time_iso)
-        now_utc = datetime.now(timezone.utc)
-        wait_seconds = (go_time - now_utc).total_seconds()
-
-        if wait_seconds > 0:
-            await asyncio.sleep(wait_seconds)
-
         command = game_adaptor.unlist_item(listing_id)
-        await app.client.send_game_command_fire_and_forget(command, priority=0)
+        await app.client.send_at(command, go_time)
     except Exception as e:
         format_and_log(LogType.ERROR, "同步下架异常", {'错误': str(e)})
 
@@ -149,18 +142,13 @@ async def execute_purchase_task(app, **payload):
         return
 
     try:
-        if is_focus_fire:
-            go_time = datetime.fromisoformat(go_time_iso)
-            now_utc = datetime.now(timezone.utc)
-            wait_seconds = (go_time - now_utc).total_seconds()
-            if wait_seconds > 0:
-                await asyncio.sleep(wait_seconds)
-        
         command = game_adaptor.buy_item(listing_id)
-        priority = 0 if is_focus_fire else 1
-        format_and_log(LogType.TASK, "协同任务-购买", {'阶段': '开始执行', '指令': command, '优先级': '最高' if priority == 0 else '普通'})
-        
-        _sent, reply = await app.client.send_game_command_request_response(command, priority=priority)
+        if is_focus_fire:
+            format_and_log(LogType.TASK, "协同任务-购买", {'阶段': '已预约', '指令': command, '执行时刻': go_time_iso})
+            _sent, reply, _skew = await app.client.send_at(command, datetime.fromisoformat(go_time_iso), expect_reply=True)
+        else:
+            format_and_log(LogType.TASK, "协同任务-购买", {'阶段': '开始执行', '指令': command, '优先级': '普通'})
+            _sent, reply = await app.client.send_game_command_request_response(command, priority=1)
         
         # [BUG 修正] 主动处理买家侧的交易成功事件
         if "交易成功" in reply.text:
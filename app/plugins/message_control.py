@@ -2,6 +2,7 @@
 import asyncio
 
 from app.context import get_application
+from app.rate_limiter import rate_limiter
 from app.utils import create_error_reply
 from config import settings
 
@@ -38,8 +39,8 @@ async def _cmd_retain_message(event, parts):
         confirm_msg = await client.reply_to_admin(event, "👌 已永久保留该消息。")
         if confirm_msg:
             await asyncio.sleep(3)
-            await confirm_msg.delete()
-            await event.message.delete()
+            await client.delete_messages(confirm_msg.chat_id, [confirm_msg.id])
+            await client.delete_messages(event.chat_id, [event.message.id])
 
     except Exception as e:
         await client.reply_to_admin(event, create_error_reply("保留消息", "操作失败", details=str(e)))
@@ -67,19 +68,19 @@ async def _cmd_cleanup_messages(event, parts):
 
     if messages_to_delete:
         try:
-            await client.client.delete_messages(event.chat_id, messages_to_delete)
-            confirm_msg = await client.client.send_message(event.chat_id, f"🧹 已成功清理 {len(messages_to_delete)} 条消息。")
+            await client.delete_messages(event.chat_id, messages_to_delete)
+            confirm_msg = await rate_limiter.run('send', lambda: client.client.send_message(event.chat_id, f"🧹 已成功清理 {len(messages_to_delete)} 条消息。"))
             await asyncio.sleep(3)
-            await confirm_msg.delete()
+            await client.delete_messages(confirm_msg.chat_id, [confirm_msg.id])
         except Exception as e:
             await client.reply_to_admin(event, create_error_reply("清理消息", "删除时发生错误", details=str(e)))
     else:
         confirm_msg = await client.reply_to_admin(event, "ℹ️ 未找到可清理的消息。")
         if confirm_msg:
             await asyncio.sleep(3)
-            await confirm_msg.delete()
+            await client.delete_messages(confirm_msg.chat_id, [confirm_msg.id])
     
-    await event.message.delete()
+    await client.delete_messages(event.chat_id, [event.message.id])
 
 
 def initialize(app):
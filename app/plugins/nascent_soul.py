@@ -107,7 +107,9 @@ async def trigger_nascent_soul_egress(force_run=False):
 
     try:
         # 2. 查询当前元婴状态
-        _sent_status, reply_status = await client.send_game_command_request_response(game_adaptor.get_nascent_soul_status())
+        # 状态决定下一步动作，且会随时间自行变化，始终实时查询
+        _sent_status, reply_status = await client.send_game_command_request_response(
+            game_adaptor.get_nascent_soul_status(), use_cache=False)
         parsed_info = _parse_nascent_soul_status(reply_status.text)
         current_state = parsed_info.get('state')
         
@@ -46,7 +46,7 @@ async def trigger_update_treasury(force_run=False):
     command = game_adaptor.get_sect_treasury()
     format_and_log(LogType.TASK, "更新宗门宝库", {'阶段': '任务开始', '强制执行': force_run})
     try:
-        _sent_message, reply_message = await client.send_game_command_request_response(command)
+        _sent_message, reply_message = await client.send_game_command_request_response(command, use_cache=not force_run)
 
         treasury_data = _parse_treasury_text(reply_message.text)
         if not treasury_data["items"]:
@@ -1,6 +1,15 @@
 from app.context import get_application
+from app.utils import require_args, send_paginated_message
 from .logic import service_logic
 
+HELP_TEXT_SEARCH_LOGS = """🔍 **检索本地日志**
+**说明**: 在日志索引中按关键词检索 app 日志与原始消息，结果按时间倒序分页 (需开启 `log_index`)。
+**用法**: `,查日志 <关键词> [时间范围] [页码]`
+**示例**:
+  `,查日志 超时`
+  `,查日志 "指令超时" 2h`
+  `,查日志 炼制 1d 2`"""
+
 async def _cmd_restart(event, parts):
     await get_application().client.reply_to_admin(event, await service_logic.logic_restart_service())
 
@@ -10,6 +19,13 @@ async def _cmd_task_list(event, parts):
 async def _cmd_reload_tasks(event, parts):
     await get_application().client.reply_to_admin(event, await service_logic.logic_reload_tasks())
 
+async def _cmd_performance_stats(event, parts):
+    await get_application().client.reply_to_admin(event, await service_logic.logic_get_performance_stats())
+
+@require_args(count=2, usage=HELP_TEXT_SEARCH_LOGS)
+async def _cmd_search_logs(event, parts):
+    await send_paginated_message(event, await service_logic.logic_search_logs(parts[1], parts[2:]))
+
 def initialize(app):
     app.register_command(
         # [修改] 指令名改为4个字
@@ -37,3 +53,20 @@ def initialize(app):
         usage="""🔄 **重载所有计划任务**
 **说明**: 当您在 `prod.yaml` 文件中修改了任何与**周期任务调度**相关的设置后，执行此命令可使新配置生效，无需重启整个程序。"""
     )
+    app.register_command(
+        name="性能统计", 
+        handler=_cmd_performance_stats, 
+        help_text="📈 查看指令延迟统计", 
+        category="系统", 
+        aliases=['perf'],
+        usage="""📈 **查看性能统计**
+**说明**: 按指令动词展示排队、冷却等待、发送RPC与等待回复四个阶段的 p50/p95/p99 耗时，并附带限流器与查询缓存的运行状态。"""
+    )
+    app.register_command(
+        name="查日志",
+        handler=_cmd_search_logs,
+        help_text="🔍 检索本地日志",
+        category="系统",
+        aliases=['logs'],
+        usage=HELP_TEXT_SEARCH_LOGS
+    )
@@ -16,6 +16,7 @@ from app.data_manager import data_manager
 from app.inventory_manager import inventory_manager
 from app.logging_service import LogType, format_and_log
 from app.plugins.logic import trade_logic
+from app.query_cache import query_cache
 from app.task_scheduler import scheduler
 from app.telegram_client import CommandTimeoutError
 from app.utils import create_error_reply, progress_manager
@@ -191,6 +192,7 @@ async def _handle_game_event(app, event_data):
     my_username = client.me.username if client.me else my_id
     update_details = []
     event_type = event_data.get("event_type")
+    query_cache.invalidate_for_event(event_type)
     
     source_map = {
         "TRADE_COMPLETED": "交易", "DONATION_COMPLETED": "宗门捐献", 
@@ -329,7 +331,7 @@ async def handle_ff_listing_successful(app, data):
         })
         
         progress_info = session['progress_message_info']
-        await app.client.client.edit_message(
+        await app.client.edit_message(
             progress_info['chat_id'],
             progress_info['message_id'],
             f"✅ `已收到挂单ID`: `{payload['listing_id']}`\n⏳ 正在进行状态质询 (阶段3)..."
@@ -386,7 +388,7 @@ async def handle_ff_report_state(app, data):
 
         wait_duration = (go_time - now_corrected).total_seconds()
         progress_info = session['progress_message_info']
-        await client.client.edit_message(
+        await client.edit_message(
             progress_info['chat_id'],
             progress_info['message_id'],
             f"✅ `状态同步完成!`\n"
@@ -470,7 +472,7 @@ async def _check_stale_sessions():
                     progress_info = session.get("progress_message_info")
                     if progress_info:
                         try:
-                            await app.client.client.edit_message(
+                            await app.client.edit_message(
                                 progress_info['chat_id'],
                                 progress_info['message_id'],
                                 create_error_reply("集火购买", "任务超时", details=f"任务（ID: ...{session_id[-6:]}）在 {timeout_seconds} 秒内未完成。")
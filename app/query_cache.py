@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+只读游戏查询的短期结果缓存
+
+以 (群组ID, 指令) 为键缓存最近一次的 (指令消息, 回复消息)。
+每种查询的有效期由 performance.query_cache_ttl 按适配器方法名配置，未配置则不缓存。
+当游戏事件表明相关状态已变化时 (如交易完成)，或发出了会改变这些状态的指令时，对应的缓存会被立即作废。
+每次作废都会推进对应查询的"代"，作废前已发出的查询即使稍后收到回复，也不会再写入缓存。
+"""
+import time
+
+from app.logging_service import LogType, format_and_log
+from config import settings
+
+# 游戏事件 -> 受其影响、需要作废的查询 (适配器方法名)
+EVENT_INVALIDATIONS = {
+    "TRADE_COMPLETED": ("get_inventory", "get_my_stall"),
+    "DELIST_COMPLETED": ("get_inventory", "get_my_stall"),
+    "DONATION_COMPLETED": ("get_inventory", "get_sect_treasury"),
+    "EXCHANGE_COMPLETED": ("get_inventory", "get_sect_treasury"),
+    "CONTRIBUTION_GAINED": ("get_sect_treasury",),
+    "TOWER_CHALLENGE_COMPLETED": ("get_inventory",),
+    "CRAFTING_COMPLETED": ("get_inventory",),
+    "HARVEST_COMPLETED": ("get_inventory",),
+    "LEARNING_COMPLETED": ("get_inventory", "get_crafting_list"),
+    "SOWING_COMPLETED": ("get_inventory",),
+    "NASCENT_SOUL_RETURNED": ("get_inventory", "get_nascent_soul_status", "get_profile"),
+    "DIVINATION_COMPLETED": ("get_inventory", "get_profile"),
+    "MEDITATION_COMPLETED": ("get_inventory", "get_profile"),
+    "MEDITATION_FAILED": ("get_profile",),
+    "REALM_BREAKTHROUGH": ("get_profile",),
+}
+
+
+class QueryCache:
+    def __init__(self):
+        self._entries = {}
+        # 全量清空推进 _epoch，按查询作废推进该查询自己的代数
+        self._epoch = 0
+        self._generations = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_ttl(query_name: str) -> int:
+        ttl_config = settings.PERFORMANCE_CONFIG.get('query_cache_ttl', {}) or {}
+        return ttl_config.get(query_name, 0)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry:
+            value, stored_at, query_name = entry
+            if time.time() - stored_at <= self.get_ttl(query_name):
+                self.hits += 1
+                return value
+            self._entries.pop(key, None)
+        self.misses += 1
+        return None
+
+    def generation(self, query_name: str) -> tuple:
+        """查询当前的代；发起查询时记下，回复到达时代已变化说明结果可能已过期。"""
+        return self._epoch, self._generations.get(query_name, 0)
+
+    def set(self, key, query_name: str, value, generation: tuple = None):
+        if generation is not None and generation != self.generation(query_name):
+            return
+        if self.get_ttl(query_name) > 0:
+            self._entries[key] = (value, time.time(), query_name)
+
+    def invalidate(self, *query_names: str):
+        if not query_names:
+            return
+        for query_name in query_names:
+            self._generations[query_name] = self._generations.get(query_name, 0) + 1
+        for key in [k for k, entry in self._entries.items() if entry[2] in query_names]:
+            self._entries.pop(key, None)
+
+    def invalidate_for_event(self, event_type: str):
+        if query_names := EVENT_INVALIDATIONS.get(event_type):
+            self.invalidate(*query_names)
+            format_and_log(LogType.DEBUG, "查询缓存", {'事件': event_type, '作废': ", ".join(query_names)})
+
+    def clear(self):
+        self._epoch += 1
+        self._entries.clear()
+
+    def get_stats(self) -> dict:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# 创建全局单例
+query_cache = QueryCache()
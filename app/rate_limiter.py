@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+全局自适应限流器 (令牌桶)
+
+所有对外的 Telethon 写操作 (发送/编辑/删除) 都应通过此模块，
+以便共享同一份速率预算。收到 FloodWaitError 时，对应桶的速率会自动下调，
+并在之后的平稳期内缓慢恢复到配置值。
+"""
+import asyncio
+import logging
+import time
+
+from telethon.errors.rpcerrorlist import FloodWaitError
+
+from app.logging_service import LogType, format_and_log
+from config import settings
+
+DEFAULT_RATE_LIMITS = {
+    'send': {'rate': 1.0, 'burst': 5},
+    'edit': {'rate': 1.0, 'burst': 5},
+    'delete': {'rate': 2.0, 'burst': 10},
+}
+
+# 触发 FloodWait 后速率乘以该系数，且不低于基础速率的 MIN_RATE_RATIO
+DECREASE_FACTOR = 0.5
+MIN_RATE_RATIO = 0.1
+# 最近一次 FloodWait 之后，需平稳运行多久才开始恢复；恢复时每秒回升基础速率的比例
+RECOVERY_DELAY_SECONDS = 60
+RECOVERY_RATIO_PER_SECOND = 0.01
+
+
+class _TokenBucket:
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_penalty_at = 0.0
+        self.throttled_seconds = 0.0
+        self.throttled_count = 0
+        self.flood_wait_count = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        # 速率只按平稳期结束之后的时间恢复，令牌只按 FloodWait 封禁结束之后的时间补充；
+        # 否则上次补充若早于退避窗口，窗口内的时间会被一并计入，退避形同虚设
+        recovery_start = max(self.updated_at, self.last_penalty_at + RECOVERY_DELAY_SECONDS)
+        if self.rate < self.base_rate and now > recovery_start:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RECOVERY_RATIO_PER_SECOND * (now - recovery_start))
+        elapsed = max(0.0, now - max(self.updated_at, self.blocked_until))
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        # 持锁等待，保证同一类操作按到达顺序获得令牌
+        async with self._lock:
+            waited = 0.0
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self.blocked_until - now
+                if delay <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+            if waited > 0:
+                self.throttled_seconds += waited
+                self.throttled_count += 1
+
+    def penalize(self, seconds: int):
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.base_rate * MIN_RATE_RATIO, self.rate * DECREASE_FACTOR)
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.last_penalty_at = now
+        self.flood_wait_count += 1
+
+    def stats(self) -> dict:
+        self._refill(time.monotonic())
+        return {
+            'rate': round(self.rate, 3),
+            'base_rate': self.base_rate,
+            'tokens': round(self.tokens, 2),
+            'throttled_seconds': round(self.throttled_seconds, 2),
+            'throttled_count': self.throttled_count,
+            'flood_wait_count': self.flood_wait_count,
+        }
+
+
+class AdaptiveRateLimiter:
+    def __init__(self):
+        self._buckets = {}
+
+    def _get_bucket(self, kind: str) -> _TokenBucket:
+        bucket = self._buckets.get(kind)
+        if bucket is None:
+            configured = settings.PERFORMANCE_CONFIG.get('rate_limits', {}) or {}
+            limits = {**DEFAULT_RATE_LIMITS.get(kind, DEFAULT_RATE_LIMITS['send']), **configured.get(kind, {})}
+            bucket = _TokenBucket(kind, limits['rate'], limits['burst'])
+            self._buckets[kind] = bucket
+        return bucket
+
+    async def acquire(self, kind: str):
+        await self._get_bucket(kind).acquire()
+
+    def report_flood_wait(self, kind: str, seconds: int):
+        bucket = self._get_bucket(kind)
+        bucket.penalize(seconds)
+        format_and_log(LogType.WARNING, "限流器-FloodWait", {
+            '类型': kind, '等待秒数': seconds, '下调后速率': f"{bucket.rate:.3f}/s"
+        }, level=logging.WARNING)
+
+    async def run(self, kind: str, coro_factory):
+        """
+        获取令牌后执行一次 RPC。
+        - coro_factory: 无参可调用对象，返回待执行的协程 (每次调用都需新建协程)。
+        """
+        await self.acquire(kind)
+        try:
+            return await coro_factory()
+        except FloodWaitError as e:
+            self.report_flood_wait(kind, e.seconds)
+            raise
+
+    def get_stats(self) -> dict:
+        return {kind: bucket.stats() for kind, bucket in self._buckets.items()}
+
+
+# 创建全局单例
+rate_limiter = AdaptiveRateLimiter()
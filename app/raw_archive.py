@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+原始消息的 JSONL 归档
+
+作为 raw_messages 日志的另一个输出：每个事件写一行 JSON
+(时间、事件类型、会话、消息ID、发送者、回复至、文本等)，便于离线分析。
+- 运行在日志管线的后台线程中，写入经过缓冲，由管线批量刷新；
+- 每个分段按时间 (默认每小时) 或大小轮转；
+- 关闭的分段在独立的压缩线程中压缩为 .gz (安装了 zstandard 时可选 .zst)，然后删除原文件。
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ACTIVE_SUFFIX = ".jsonl"
+
+
+def _compress_segment(path: str, compression: str):
+    """压缩一个已关闭的分段，成功后删除原文件。"""
+    try:
+        if compression == 'zstd' and zstandard is not None:
+            with open(path, 'rb') as src, open(f"{path}.zst.tmp", 'wb') as dst:
+                zstandard.ZstdCompressor(level=10).copy_stream(src, dst)
+            os.replace(f"{path}.zst.tmp", f"{path}.zst")
+        else:
+            with open(path, 'rb') as src, gzip.open(f"{path}.gz.tmp", 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(f"{path}.gz.tmp", f"{path}.gz")
+        os.remove(path)
+    except OSError as e:
+        logging.getLogger('app').warning(f"[原始消息归档] 压缩分段 {path} 失败: {e}")
+
+
+class JsonlArchiveHandler(logging.Handler):
+    """只处理带有 raw_event 字段的记录 (由 log_telegram_event 附加)。"""
+
+    def __init__(self, directory: str, rotate_minutes: int = 60, max_bytes: int = 50 * 1024 * 1024,
+                 compression: str = 'gzip', tz=None):
+        super().__init__()
+        self.directory = directory
+        self.tz = tz
+        self.rotate_seconds = rotate_minutes * 60
+        self.max_bytes = max_bytes
+        self.compression = compression if compression != 'zstd' or zstandard is not None else 'gzip'
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="raw-archive-compress")
+        self._stream = None
+        self._path = None
+        self._size = 0
+        self._rollover_at = 0
+        os.makedirs(directory, exist_ok=True)
+        # 上次运行未能压缩的分段 (如异常退出)
+        for path in sorted(glob.glob(os.path.join(directory, f"*{ACTIVE_SUFFIX}"))):
+            self._compressor.submit(_compress_segment, path, self.compression)
+
+    def _open_segment(self):
+        now = time.time()
+        stamp = datetime.fromtimestamp(now, self.tz).strftime('%Y%m%d-%H%M%S')
+        self._path = os.path.join(self.directory, f"raw-{stamp}{ACTIVE_SUFFIX}")
+        sequence = 1
+        while glob.glob(f"{self._path}*"):
+            # 同一秒内按大小多次轮转时，避免与尚在压缩的分段重名
+            sequence += 1
+            self._path = os.path.join(self.directory, f"raw-{stamp}-{sequence}{ACTIVE_SUFFIX}")
+        self._stream = open(self._path, 'a', encoding='utf-8', buffering=256 * 1024)
+        self._size = 0
+        # 按整点 (或配置的间隔) 对齐轮转时刻
+        self._rollover_at = now - now % self.rotate_seconds + self.rotate_seconds
+
+    def _close_segment(self):
+        if self._stream is None:
+            return
+        self._stream.close()
+        self._stream = None
+        if self._size:
+            self._compressor.submit(_compress_segment, self._path, self.compression)
+        else:
+            os.remove(self._path)
+
+    def emit(self, record):
+        raw_event = getattr(record, 'raw_event', None)
+        if raw_event is None:
+            return
+        try:
+            line = json.dumps(raw_event, ensure_ascii=False, separators=(',', ':'), default=str) + "\n"
+            if self._stream is not None and (time.time() >= self._rollover_at or self._size >= self.max_bytes):
+                self._close_segment()
+            if self._stream is None:
+                self._open_segment()
+            self._stream.write(line)
+            self._size += len(line.encode('utf-8'))
+        except Exception:
+            self.handleError(record)
+
+    def flush_batch(self):
+        if self._stream is not None:
+            self._stream.flush()
+
+    def close(self):
+        self._close_segment()
+        self._compressor.shutdown(wait=True)
+        super().close()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Redis 任务执行器
+
+Pub/Sub 读取循环只负责把消息交给执行器，不再为每条消息创建一个不受限的任务。
+- 每种任务类型一条执行通道 (FIFO)，通道内的并发数受配置限制，慢任务不会拖住其他类型；
+- 所有通道共享一个有界收件箱，积压达到上限时按配置阻塞读取循环 (block) 或丢弃新消息 (drop)；
+- 指定类型的任务若已有相同内容在排队，新消息直接合并，不再重复执行。
+"""
+import asyncio
+import logging
+import time
+
+from app.logging_service import LogType, format_and_log
+from config import settings
+
+
+class _Lane:
+    __slots__ = ('queue', 'workers', 'running', 'processed', 'failed')
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.workers = []
+        self.running = 0
+        self.processed = 0
+        self.failed = 0
+
+
+class RedisTaskExecutor:
+    def __init__(self, handler):
+        self._handler = handler
+        self._lanes = {}
+        self._pending = 0
+        self._pending_keys = set()
+        self._space = None
+        self.max_depth = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked_seconds = 0.0
+
+    @staticmethod
+    def _config() -> dict:
+        return settings.PERFORMANCE_CONFIG
+
+    def _capacity(self) -> int:
+        return self._config().get('redis_inbox_size', 500)
+
+    def _concurrency(self, task_type: str) -> int:
+        if task_type == 'game_event':
+            # 游戏事件之间有先后依赖，必须串行；不依赖配置，因为覆盖整个字典时会丢失该项
+            return 1
+        limits = self._config().get('redis_task_concurrency', {})
+        return max(1, int(limits.get(task_type, limits.get('default', 4))))
+
+    def _lane(self, task_type: str) -> _Lane:
+        lane = self._lanes.get(task_type)
+        if lane is None:
+            lane = self._lanes[task_type] = _Lane()
+            for _ in range(self._concurrency(task_type)):
+                lane.workers.append(asyncio.create_task(self._worker(task_type, lane)))
+        return lane
+
+    async def submit(self, task_type: str, message):
+        """将消息放入对应通道；收件箱已满时按过载策略阻塞或丢弃。"""
+        coalesce_key = None
+        if task_type in self._config().get('redis_coalesce_task_types', []):
+            coalesce_key = (task_type, message.get('data'))
+            if coalesce_key in self._pending_keys:
+                self.coalesced += 1
+                return
+
+        if self._pending >= self._capacity():
+            if self._config().get('redis_overload_policy', 'block') == 'drop':
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 100 == 0:
+                    format_and_log(LogType.WARNING, "Redis 任务执行器", {
+                        '状态': '收件箱已满，丢弃新消息', '任务类型': task_type, '累计丢弃': self.dropped
+                    })
+                return
+            if self._space is None:
+                self._space = asyncio.Condition()
+            started = time.monotonic()
+            async with self._space:
+                await self._space.wait_for(lambda: self._pending < self._capacity())
+            self.blocked_seconds += time.monotonic() - started
+
+        self._pending += 1
+        self.max_depth = max(self.max_depth, self._pending)
+        if coalesce_key:
+            self._pending_keys.add(coalesce_key)
+        self._lane(task_type).queue.put_nowait((message, coalesce_key))
+
+    async def _worker(self, task_type: str, lane: _Lane):
+        while True:
+            message, coalesce_key = await lane.queue.get()
+            if coalesce_key:
+                self._pending_keys.discard(coalesce_key)
+            lane.running += 1
+            try:
+                await self._handler(message)
+                lane.processed += 1
+            except Exception as e:
+                lane.failed += 1
+                format_and_log(LogType.ERROR, "Redis 任务执行器", {
+                    '状态': '任务异常', '任务类型': task_type, '错误': str(e)
+                }, level=logging.ERROR)
+            finally:
+                lane.running -= 1
+                await self._release()
+
+    async def _release(self):
+        self._pending -= 1
+        if self._space is not None:
+            async with self._space:
+                self._space.notify()
+
+    async def stop(self):
+        """关机时取消全部工作协程，未执行的消息被放弃。"""
+        workers = [task for lane in self._lanes.values() for task in lane.workers]
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._lanes.clear()
+        self._pending = 0
+        self._pending_keys.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            'pending': self._pending,
+            'capacity': self._capacity(),
+            'max_depth': self.max_depth,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'blocked_seconds': round(self.blocked_seconds, 1),
+            'lanes': {
+                task_type: {
+                    'queued': lane.queue.qsize(), 'running': lane.running,
+                    'concurrency': len(lane.workers), 'processed': lane.processed, 'failed': lane.failed,
+                }
+                for task_type, lane in self._lanes.items()
+            },
+        }
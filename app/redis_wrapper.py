@@ -78,9 +78,18 @@ class RedisWrapper:
 
     @staticmethod
     def _is_read_command(command_name: str) -> bool:
-        read_commands = ['get', 'hget', 'hgetall', 'exists', 'hexists', 'keys', 'hkeys', 'ping', 'type', 'strlen', 'llen', 'lrange']
+        read_commands = ['get', 'hget', 'hgetall', 'exists', 'hexists', 'keys', 'hkeys', 'ping', 'type', 'strlen', 'llen', 'lrange', 'zrange', 'zrangebyscore', 'zscore', 'zcard']
         return command_name in read_commands
 
+    def pipeline(self, transaction: bool = True):
+        """
+        [新增] 返回原始客户端的管道，不经过异常包装：execute() 失败时直接抛出异常，
+        供需要确认写入是否成功的调用方使用 (包装后的命令失败时只返回 0，无法与正常结果区分)。
+        """
+        if not self._client:
+            raise ConnectionError("Redis 未连接")
+        return self._client.pipeline(transaction=transaction)
+
     def pubsub(self):
         if not self._client:
             class FakePubSub:
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+回复等待者注册表
+
+集中管理所有"发送指令后等待游戏回复"的等待者：
+- 回复等待: 以被回复的指令消息ID为键。
+- @提及等待: 先判断一次是否提及本账号，再逐个检查最终模式。
+- 先回复后编辑等待: 新消息按发送者ID索引，编辑消息按消息ID索引。
+
+所有正则在注册时编译一次，并从中提取必须出现的字面量片段作为预过滤条件，
+每条消息只会与可能被它满足的等待者进行正则匹配。
+"""
+import itertools
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+_REGEX_META = set('.^$*+?{}[]()|\\')
+_QUANTIFIERS = set('*?{')
+
+
+def _class_end(pattern: str, start: int) -> int:
+    """返回从 start 处的 '[' 开始的字符集结束后的位置；支持转义以及紧跟 '[' 或 '[^' 的字面量 ']'。"""
+    i = start + 1
+    if i < len(pattern) and pattern[i] == '^':
+        i += 1
+    if i < len(pattern) and pattern[i] == ']':
+        i += 1
+    while i < len(pattern):
+        if pattern[i] == '\\':
+            i += 2
+        elif pattern[i] == ']':
+            return i + 1
+        else:
+            i += 1
+    return len(pattern)
+
+
+def _split_top_level_alternatives(pattern: str) -> list[str] | None:
+    """按顶层 '|' 拆分模式；遇到字符集内或转义的 '|' 时保持原样。"""
+    branches, current, depth, i = [], [], 0, 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\' and i + 1 < len(pattern):
+            current.append(pattern[i:i + 2]); i += 2
+            continue
+        if c == '[':
+            end = _class_end(pattern, i)
+            current.append(pattern[i:end]); i = end
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            branches.append(''.join(current)); current = []; i += 1
+            continue
+        current.append(c); i += 1
+    branches.append(''.join(current))
+    return branches
+
+
+def _longest_required_literal(branch: str) -> str:
+    """提取一个分支中必然出现的最长字面量片段 (保守实现，只看分组之外的部分)。"""
+    best, current, depth, i = '', [], 0, 0
+
+    def flush():
+        nonlocal best, current
+        if len(current) > len(best):
+            best = ''.join(current)
+        current = []
+
+    while i < len(branch):
+        c = branch[i]
+        literal = None
+        if c == '\\' and i + 1 < len(branch):
+            nxt = branch[i + 1]
+            literal = None if nxt.isalnum() else nxt
+            i += 2
+        elif c == '[':
+            i = _class_end(branch, i)
+        elif c == '{':
+            # 计数量词 {m,n} 中的数字不是字面量，整体跳过
+            end = branch.find('}', i + 1)
+            i = end + 1 if end != -1 else i + 1
+        elif c == '(':
+            depth += 1; i += 1
+        elif c == ')':
+            depth -= 1; i += 1
+        elif c in _REGEX_META:
+            i += 1
+        else:
+            literal = c; i += 1
+
+        next_char = branch[i] if i < len(branch) else ''
+        if literal is None or depth > 0 or next_char in _QUANTIFIERS:
+            flush()
+            continue
+        current.append(literal)
+        if next_char == '+':
+            flush()
+    flush()
+    return best
+
+
+def extract_literal_tokens(pattern: str) -> tuple[str, ...] | None:
+    """
+    返回一组字面量片段，文本要能匹配该模式，至少需包含其中之一。
+    无法可靠提取时返回 None (表示不做预过滤)。
+    """
+    if not pattern or '(?' in pattern:
+        return None
+    tokens = []
+    for branch in _split_top_level_alternatives(pattern):
+        token = _longest_required_literal(branch)
+        if not token:
+            return None
+        tokens.append(token)
+    return tuple(tokens)
+
+
+class CompiledPattern:
+    __slots__ = ('regex', 'tokens')
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.regex = re.compile(pattern, flags)
+        # 忽略大小写时字面量包含判断不成立，不做预过滤
+        self.tokens = None if flags & re.IGNORECASE else extract_literal_tokens(pattern)
+
+    def matches(self, text: str) -> bool:
+        if self.tokens and not any(token in text for token in self.tokens):
+            return False
+        return self.regex.search(text) is not None
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str, flags: int = re.DOTALL) -> CompiledPattern:
+    return CompiledPattern(pattern, flags)
+
+
+class _EditWaiter:
+    __slots__ = ('future', 'initial', 'final', 'from_user_ids', 'initial_candidate', 'final_candidates')
+
+    def __init__(self, future, initial, final, from_user_ids):
+        self.future = future
+        self.initial = initial
+        self.final = final
+        self.from_user_ids = set(from_user_ids)
+        self.initial_candidate = None
+        self.final_candidates = {}
+
+
+class ReplyWaiterRegistry:
+    def __init__(self):
+        self._ids = itertools.count()
+        # 回复等待: 指令消息ID -> (future, pattern)
+        self._reply_waiters = {}
+        # @提及等待: 提及模式 -> {waiter_id: (future, final_pattern)}
+        self._mention_groups = defaultdict(dict)
+        self._mention_index = {}
+        # 编辑等待
+        self._edit_waiters = {}
+        self._edit_by_sender = defaultdict(set)
+        self._edit_by_message = defaultdict(set)
+        self._edit_unanchored = set()
+
+    # --- 注册与注销 ---
+
+    def add_reply_waiter(self, message_id: int, future, pattern: str = ".*"):
+        self._reply_waiters[message_id] = (future, compile_pattern(pattern))
+
+    def remove_reply_waiter(self, message_id: int):
+        self._reply_waiters.pop(message_id, None)
+
+    def add_mention_waiter(self, future, mention_pattern: str, final_pattern: str) -> int:
+        waiter_id = next(self._ids)
+        self._mention_groups[mention_pattern][waiter_id] = (future, compile_pattern(final_pattern))
+        self._mention_index[waiter_id] = mention_pattern
+        return waiter_id
+
+    def remove_mention_waiter(self, waiter_id: int):
+        mention_pattern = self._mention_index.pop(waiter_id, None)
+        if mention_pattern is None:
+            return
+        group = self._mention_groups.get(mention_pattern)
+        if group is not None:
+            group.pop(waiter_id, None)
+            if not group:
+                self._mention_groups.pop(mention_pattern, None)
+
+    def add_edit_waiter(self, future, initial_pattern: str, final_pattern: str, from_user_ids) -> int:
+        waiter_id = next(self._ids)
+        waiter = _EditWaiter(future, compile_pattern(initial_pattern), compile_pattern(final_pattern), from_user_ids)
+        self._edit_waiters[waiter_id] = waiter
+        for user_id in waiter.from_user_ids:
+            self._edit_by_sender[user_id].add(waiter_id)
+        self._edit_unanchored.add(waiter_id)
+        return waiter_id
+
+    def remove_edit_waiter(self, waiter_id: int):
+        waiter = self._edit_waiters.pop(waiter_id, None)
+        if waiter is None:
+            return
+        self._unindex_initial(waiter_id, waiter)
+        if waiter.initial_candidate is not None:
+            self._discard_from(self._edit_by_message, waiter.initial_candidate.id, waiter_id)
+
+    @staticmethod
+    def _discard_from(index: dict, key, waiter_id: int):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(waiter_id)
+            if not bucket:
+                index.pop(key, None)
+
+    def _unindex_initial(self, waiter_id: int, waiter: _EditWaiter):
+        for user_id in waiter.from_user_ids:
+            self._discard_from(self._edit_by_sender, user_id, waiter_id)
+        self._edit_unanchored.discard(waiter_id)
+
+    # --- 分发 ---
+
+    def dispatch(self, message, is_edit: bool, sender_id: int = None, reply_to_msg_id: int = None):
+        """用一条新消息或编辑消息尝试满足等待者。"""
+        text = message.text
+        if not text:
+            return
+
+        # 1. 基于 reply_to_msg_id 的等待
+        if not is_edit and reply_to_msg_id is not None:
+            if waiter := self._reply_waiters.get(reply_to_msg_id):
+                future, pattern = waiter
+                if not future.done() and pattern.matches(text):
+                    future.set_result(message)
+
+        # 2. 基于 @提及 的等待: 每种提及模式只判断一次
+        for mention_pattern, group in list(self._mention_groups.items()):
+            if not compile_pattern(mention_pattern, 0).matches(text):
+                continue
+            for waiter_id, (future, final) in list(group.items()):
+                if not future.done() and final.matches(text):
+                    future.set_result(message)
+                    self.remove_mention_waiter(waiter_id)
+
+        # 3. 先回复后编辑的等待
+        if is_edit:
+            self._dispatch_edit(message, text)
+        elif sender_id is not None:
+            self._dispatch_initial(message, text, sender_id)
+
+    def _dispatch_initial(self, message, text: str, sender_id: int):
+        for waiter_id in list(self._edit_by_sender.get(sender_id, ())):
+            waiter = self._edit_waiters.get(waiter_id)
+            if waiter is None or waiter.future.done() or not waiter.initial.matches(text):
+                continue
+            waiter.initial_candidate = message
+            self._unindex_initial(waiter_id, waiter)
+            self._edit_by_message[message.id].add(waiter_id)
+            # 编辑事件可能先于新消息事件到达
+            if final_message := waiter.final_candidates.pop(message.id, None):
+                waiter.future.set_result(final_message)
+                self.remove_edit_waiter(waiter_id)
+            waiter.final_candidates.clear()
+
+    def _dispatch_edit(self, message, text: str):
+        for waiter_id in list(self._edit_by_message.get(message.id, ())):
+            waiter = self._edit_waiters.get(waiter_id)
+            if waiter and not waiter.future.done() and waiter.final.matches(text):
+                waiter.future.set_result(message)
+                self.remove_edit_waiter(waiter_id)
+        for waiter_id in list(self._edit_unanchored):
+            waiter = self._edit_waiters.get(waiter_id)
+            if waiter and not waiter.future.done() and waiter.final.matches(text):
+                waiter.final_candidates[message.id] = message
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+发送者显示名缓存
+
+原始日志只需要发送者的显示名。名称优先取自更新中已携带的实体 (不产生网络请求)，
+写入 id -> (显示名, 时间) 的 LRU 缓存；缓存缺失或过期时先返回现有结果，
+再在后台补查一次实体，日志记录本身从不等待实体查询。
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+from telethon.tl.types import Channel, MessageService
+from telethon.utils import get_display_name
+
+from config import settings
+
+
+def _describe(entity) -> str | None:
+    if entity is None:
+        return None
+    if isinstance(entity, (MessageService, Channel)) and hasattr(entity, 'title'):
+        return f"频道/群组事件 ({entity.title})"
+    return get_display_name(entity) or None
+
+
+class SenderNameCache:
+    def __init__(self):
+        self._names = OrderedDict()
+        self._refreshing = set()
+
+    @staticmethod
+    def _ttl() -> int:
+        return settings.PERFORMANCE_CONFIG.get('sender_name_ttl_seconds', 3600)
+
+    def put(self, sender_id, entity=None, name: str = None):
+        name = name or _describe(entity)
+        if sender_id and name:
+            self._names[int(sender_id)] = (name, time.time())
+            self._names.move_to_end(int(sender_id))
+            while len(self._names) > settings.PERFORMANCE_CONFIG.get('sender_name_cache_size', 5000):
+                self._names.popitem(last=False)
+
+    def get_name(self, client, sender_id, entity=None) -> str | None:
+        """返回缓存中的显示名；缺失或过期时在后台刷新，本次调用不等待。"""
+        if not sender_id:
+            return None
+        if entity is not None:
+            self.put(sender_id, entity)
+        entry = self._names.get(int(sender_id))
+        if entry is not None:
+            self._names.move_to_end(int(sender_id))
+        if entry is None or time.time() - entry[1] > self._ttl():
+            self._schedule_refresh(client, int(sender_id))
+        return entry[0] if entry else None
+
+    def _schedule_refresh(self, client, sender_id: int):
+        if client is None or sender_id in self._refreshing:
+            return
+        self._refreshing.add(sender_id)
+        asyncio.create_task(self._refresh(client, sender_id))
+
+    async def _refresh(self, client, sender_id: int):
+        try:
+            self.put(sender_id, await client.client.get_entity(sender_id))
+        except Exception:
+            pass
+        finally:
+            self._refreshing.discard(sender_id)
+
+
+# 创建全局单例
+sender_cache = SenderNameCache()
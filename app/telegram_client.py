@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import asyncio
+import itertools
 import logging
 import random
 import re
@@ -13,13 +14,24 @@ from telethon.errors.rpcerrorlist import (MessageDeleteForbiddenError,
                                           SlowModeWaitError)
 from telethon.tl.functions.channels import (GetFullChannelRequest,
                                           GetParticipantRequest)
-from telethon.tl.types import (Channel, Message, UpdateDeleteChannelMessages,
+from telethon.tl.types import (Channel, Message, UpdateChannel,
+                               UpdateChannelParticipant,
+                               UpdateDeleteChannelMessages,
                                UpdateDeleteMessages)
 from telethon.utils import get_display_name
 
-from app.constants import STATE_KEY_LAST_TIMESTAMPS
+from app import game_adaptor
+from app.constants import PENDING_DELETIONS_KEY, STATE_KEY_LAST_TIMESTAMPS
 from app.data_manager import data_manager
+from app.deletion_scheduler import DeletionScheduler
+from app.latency_stats import latency_stats
+from app.message_cache import message_cache
+from app.sender_cache import sender_cache
+from app.message_context import MessageHub
 from app.logging_service import LogType, format_and_log, log_telegram_event
+from app.query_cache import query_cache
+from app.rate_limiter import rate_limiter
+from app.reply_waiters import ReplyWaiterRegistry
 from config import settings
 
 
@@ -40,31 +52,75 @@ class TelegramClient:
 
         self.group_name_cache = {}
         self.slowmode_cache = {}
+        # [新增] 每个群组的发言限制缓存: chat_id -> {'until': datetime | None, 'updated_at': float}
+        # 发送路径只读取此缓存，不再为每条指令发起 RPC 查询
+        self.chat_restrictions = {}
+        self._chat_state_refreshing = set()
         self.last_message_timestamps = {}
-
-        self.message_queue = asyncio.PriorityQueue()
-        self.deletion_tasks = {}
+        # [新增] 发言时间戳写回缓冲：发送路径只标记脏数据，由后台任务合并写入 Redis
+        self._timestamps_dirty = False
+        self._timestamps_flush_task = None
+
+        # [新增] 每个目标群组一条独立的发送通道 (优先级队列 + 工作协程)，按需创建
+        # 某个群组的慢速模式等待不再阻塞发往其他群组的指令
+        self.send_lanes = {}
+        self.send_lane_workers = {}
+        self._send_sequence = itertools.count()
+        self._send_semaphore = asyncio.Semaphore(settings.PERFORMANCE_CONFIG.get('max_concurrent_sends', 3))
+        # [新增] 定时发送的通道预约: chat_id -> [{'deadline': 时间戳, 'done': asyncio.Event}]
+        self.lane_reservations = {}
+        # [核心修改] 所有自动删除共用一个调度器，到期后按群组批量删除
+        self.deletion_scheduler = DeletionScheduler(self._delete_message_batch)
         self._pinned_messages = set()
 
-        self.pending_replies = {}
-        self.pending_mention_replies = {}
-        # [核心修改] 用于全新的、健壮的“先回复后编辑”等待机制
-        self.pending_edits = {}
+        # [核心修改] 回复/@提及/先回复后编辑 三类等待统一由带索引的注册表管理
+        self.reply_waiters = ReplyWaiterRegistry()
         
         self.fire_and_forget_tasks = set()
+        # [新增] 进行中的只读查询: (chat_id, command) -> (Future, 发起时的缓存代)，相同查询的并发调用共享一次发送与回复
+        self._inflight_queries = {}
 
         all_configured_groups = settings.GAME_GROUP_IDS + ([settings.CONTROL_GROUP_ID] if settings.CONTROL_GROUP_ID else [])
         if getattr(settings, 'TEST_GROUP_ID', None):
             all_configured_groups.append(settings.TEST_GROUP_ID)
 
+        self._configured_groups = {int(chat_id) for chat_id in all_configured_groups}
+
+        # [核心修改] 统一的消息接入层：每条消息只构建一次标准化上下文，再分发给订阅的插件
+        self.message_hub = MessageHub()
         self.client.on(events.NewMessage(chats=all_configured_groups))(self._unified_event_handler)
         self.client.on(events.MessageEdited(chats=all_configured_groups))(self._unified_event_handler)
+        # 管理员私聊与收藏夹只用于接收管理指令
+        self.client.on(events.NewMessage(chats=[int(settings.ADMIN_USER_ID), 'me']))(self._unified_event_handler)
         self.client.add_event_handler(self._deleted_message_handler,
                                       events.Raw(types=[UpdateDeleteChannelMessages, UpdateDeleteMessages]))
+        self.client.add_event_handler(self._chat_state_update_handler,
+                                      events.Raw(types=[UpdateChannel, UpdateChannelParticipant]))
 
     async def _persist_timestamps(self):
         if data_manager and data_manager.db and data_manager.db.is_connected:
-            await data_manager.save_value(STATE_KEY_LAST_TIMESTAMPS, self.last_message_timestamps)
+            await data_manager.save_value(STATE_KEY_LAST_TIMESTAMPS, dict(self.last_message_timestamps))
+
+    def _mark_timestamps_dirty(self):
+        """标记时间戳待写回，并确保在一个写回周期内最多落盘一次。"""
+        self._timestamps_dirty = True
+        if self._timestamps_flush_task is None or self._timestamps_flush_task.done():
+            self._timestamps_flush_task = asyncio.create_task(self._delayed_flush_timestamps())
+
+    async def _delayed_flush_timestamps(self):
+        await asyncio.sleep(settings.PERFORMANCE_CONFIG.get('timestamp_flush_interval_seconds', 5))
+        await self.flush_timestamps()
+
+    async def flush_timestamps(self):
+        """立即写回待持久化的时间戳，供写回周期及关机流程调用。"""
+        if not self._timestamps_dirty:
+            return
+        self._timestamps_dirty = False
+        try:
+            await self._persist_timestamps()
+        except Exception as e:
+            self._timestamps_dirty = True
+            format_and_log(LogType.ERROR, "发言时间戳写回失败", {'错误': str(e)}, level=logging.ERROR)
 
     async def _load_timestamps(self):
         if data_manager and data_manager.db and data_manager.db.is_connected:
@@ -72,24 +128,66 @@ class TelegramClient:
             self.last_message_timestamps = {int(k): v for k, v in loaded_timestamps.items()}
             format_and_log(LogType.SYSTEM, "状态加载", {'模块': '发言时间戳', '状态': '加载成功'})
 
+    @staticmethod
+    def _extract_until_date(participant):
+        """从参与者对象中取出限制截止时间 (禁言/封禁)。"""
+        if participant is None:
+            return None
+        until_date = getattr(participant, 'until_date', None)
+        if until_date is None and getattr(participant, 'banned_rights', None):
+            until_date = getattr(participant.banned_rights, 'until_date', None)
+        return until_date
+
     async def get_participant_info(self, chat_id, user_id):
         try:
             chat_entity = await self.client.get_entity(chat_id)
             user_entity = await self.client.get_entity(int(user_id))
             participant = await self.client(GetParticipantRequest(chat_entity, user_entity))
             if participant and hasattr(participant, 'participant'):
-                 return getattr(participant.participant, 'until_date', None)
+                 return self._extract_until_date(participant.participant)
             return None
         except Exception as e:
             format_and_log(LogType.ERROR, "查询参与者信息失败", {'Chat': chat_id, 'User': user_id, '错误': str(e)})
             return None
 
+    def _set_chat_restriction(self, chat_id: int, until: datetime | None):
+        self.chat_restrictions[int(chat_id)] = {'until': until, 'updated_at': time.time()}
+
+    def _schedule_chat_state_refresh(self, chat_id: int):
+        chat_id = int(chat_id)
+        if chat_id in self._chat_state_refreshing or not self.me:
+            return
+        self._chat_state_refreshing.add(chat_id)
+        asyncio.create_task(self._refresh_chat_state(chat_id))
+
+    async def _refresh_chat_state(self, chat_id: int):
+        """后台刷新单个群组的慢速模式与发言限制，仅在缓存过期或收到变更通知时触发。"""
+        try:
+            entity = await self.client.get_entity(chat_id)
+            if isinstance(entity, Channel):
+                full_channel = await self.client(GetFullChannelRequest(channel=entity))
+                self.slowmode_cache[chat_id] = getattr(full_channel.full_chat, 'slowmode_seconds', 0) or 0
+            until = await self.get_participant_info(chat_id, self.me.id)
+            self._set_chat_restriction(chat_id, until)
+        except Exception as e:
+            format_and_log(LogType.ERROR, "刷新群组发言状态失败", {'Chat': chat_id, '错误': str(e)})
+        finally:
+            self._chat_state_refreshing.discard(chat_id)
+
+    def _get_chat_restriction_until(self, chat_id: int) -> datetime | None:
+        """纯本地读取发言限制；缓存缺失或过期时仅安排一次后台刷新，不阻塞发送。"""
+        state = self.chat_restrictions.get(int(chat_id))
+        ttl = settings.PERFORMANCE_CONFIG.get('chat_state_ttl_seconds', 300)
+        if state is None or time.time() - state['updated_at'] > ttl:
+            self._schedule_chat_state_refresh(chat_id)
+        return state['until'] if state else None
+
     async def get_next_sendable_time(self, chat_id: int) -> datetime:
         now_utc = datetime.now(timezone.utc)
-        my_id = self.me.id
-        slow_mode_until = await self.get_participant_info(chat_id, my_id)
+        slow_mode_until = self._get_chat_restriction_until(chat_id)
         last_sent_timestamp = self.last_message_timestamps.get(chat_id, 0)
         send_delay = random.uniform(settings.SEND_DELAY['min'], settings.SEND_DELAY['max'])
+        send_delay = max(send_delay, self.slowmode_cache.get(chat_id, 0))
         internal_cooldown_until = datetime.fromtimestamp(last_sent_timestamp + send_delay, tz=timezone.utc)
         earliest_time = max(now_utc, internal_cooldown_until)
         if slow_mode_until and slow_mode_until > earliest_time:
@@ -98,7 +196,7 @@ class TelegramClient:
 
     async def reply_to_admin(self, event, text: str, schedule_deletion=True, **kwargs):
         try:
-            reply_message = await event.reply(text, **kwargs)
+            reply_message = await rate_limiter.run('send', lambda: event.reply(text, **kwargs))
             if schedule_deletion:
                 self._schedule_message_deletion(reply_message, settings.AUTO_DELETE.get('delay_admin_command'), "助手对管理员的回复")
             return reply_message
@@ -106,34 +204,80 @@ class TelegramClient:
             format_and_log(LogType.ERROR, "回复管理员失败", {'错误': str(e)}, level=logging.ERROR)
             return None
 
-    async def _message_sender_loop(self):
+    def _resolve_target_chat(self, target_chat_id: int = None) -> int:
+        target_group = target_chat_id or (settings.GAME_GROUP_IDS[0] if settings.GAME_GROUP_IDS else 0)
+        if not target_group:
+            raise Exception("No target group specified.")
+        return int(target_group)
+
+    def _get_send_lane(self, chat_id: int) -> asyncio.PriorityQueue:
+        """获取 (必要时创建) 指定群组的发送通道。"""
+        lane = self.send_lanes.get(chat_id)
+        if lane is None:
+            lane = asyncio.PriorityQueue()
+            self.send_lanes[chat_id] = lane
+        worker = self.send_lane_workers.get(chat_id)
+        if worker is None or worker.done():
+            self.send_lane_workers[chat_id] = asyncio.create_task(self._message_sender_loop(chat_id, lane))
+        return lane
+
+    def _blocking_reservation(self, target_group: int):
+        """若该通道有定时发送即将到点，返回其预约；此时普通指令需让路，以免占用冷却窗口。"""
+        window = max(settings.SEND_DELAY['max'], self.slowmode_cache.get(target_group, 0))
+        window += settings.PERFORMANCE_CONFIG.get('deadline_guard_seconds', 1)
+        now = time.time()
+        for reservation in self.lane_reservations.get(target_group, []):
+            if now >= reservation['deadline'] - window:
+                return reservation
+        return None
+
+    async def _send_now(self, target_group: int, command: str, reply_to: int = None) -> Message:
+        """立即发送一条指令 (已完成排队与冷却等待)，并记录发言时间与日志。"""
+        final_reply_to = reply_to
+        if target_group in settings.GAME_GROUP_IDS and settings.GAME_TOPIC_ID and not reply_to:
+            final_reply_to = settings.GAME_TOPIC_ID
+
+        async with self._send_semaphore:
+            send_started = time.monotonic()
+            try:
+                sent_message = await rate_limiter.run(
+                    'send', lambda: self.client.send_message(target_group, command, reply_to=final_reply_to))
+            except SlowModeWaitError as e:
+                # 以服务器给出的等待时间校正本地缓存，后续指令将直接按此排队
+                self._set_chat_restriction(target_group, datetime.now(timezone.utc) + timedelta(seconds=e.seconds))
+                raise
+            latency_stats.record(command, 'send', time.monotonic() - send_started)
+
+        if not sent_message:
+            raise Exception("Failed to send message.")
+        message_cache.put(sent_message)
+        self.last_message_timestamps[target_group] = time.time()
+        self._mark_timestamps_dirty()
+        await log_telegram_event(self, LogType.CMD_SENT, sent_message, command=command, reply_to=final_reply_to)
+        return sent_message
+
+    async def _message_sender_loop(self, target_group: int, lane: asyncio.PriorityQueue):
+        """单个群组通道的发送循环：通道内按优先级出队，冷却时钟独立计算。"""
         while True:
-            priority, (command, reply_to, future, target_chat_id, post_send_callback) = await self.message_queue.get()
+            priority, _seq, (command, reply_to, future, post_send_callback, enqueued_at) = await lane.get()
             sent_message = None
+            dequeued_at = time.monotonic()
+            latency_stats.record(command, 'queue', dequeued_at - enqueued_at)
             try:
-                target_group = target_chat_id or (settings.GAME_GROUP_IDS[0] if settings.GAME_GROUP_IDS else 0)
-                if not target_group:
-                    raise Exception("No target group specified.")
-
-                earliest_send_time = await self.get_next_sendable_time(target_group)
-                now_utc = datetime.now(timezone.utc)
-                wait_seconds = (earliest_send_time - now_utc).total_seconds()
-                if wait_seconds > 0:
-                    await asyncio.sleep(wait_seconds)
-
-                final_reply_to = reply_to
-                if target_group in settings.GAME_GROUP_IDS and settings.GAME_TOPIC_ID and not reply_to:
-                    final_reply_to = settings.GAME_TOPIC_ID
-
-                sent_message = await self.client.send_message(target_group, command, reply_to=final_reply_to)
-                
-                if sent_message:
-                    self.last_message_timestamps[target_group] = time.time()
-                    await self._persist_timestamps()
-                    await log_telegram_event(self, LogType.CMD_SENT, sent_message, command=command, reply_to=final_reply_to)
-                    if future: future.set_result(sent_message)
-                else:
-                    raise Exception("Failed to send message.")
+                while True:
+                    earliest_send_time = await self.get_next_sendable_time(target_group)
+                    now_utc = datetime.now(timezone.utc)
+                    wait_seconds = (earliest_send_time - now_utc).total_seconds()
+                    if wait_seconds > 0:
+                        await asyncio.sleep(wait_seconds)
+                    reservation = self._blocking_reservation(target_group)
+                    if reservation is None:
+                        break
+                    await reservation['done'].wait()
+                latency_stats.record(command, 'slowmode', time.monotonic() - dequeued_at)
+
+                sent_message = await self._send_now(target_group, command, reply_to)
+                if future: future.set_result(sent_message)
 
             except Exception as e:
                 if future: future.set_exception(e)
@@ -145,13 +289,86 @@ class TelegramClient:
                     except Exception as cb_e:
                         format_and_log(LogType.ERROR, "发送后回调执行失败", {'错误': str(cb_e)}, level=logging.ERROR)
                 
-                self.message_queue.task_done()
+                lane.task_done()
+
+    def _hard_sendable_timestamp(self, target_group: int) -> float:
+        """只考虑慢速模式与禁言等硬性限制 (不含随机发送间隔) 的最早可发送时间戳。"""
+        earliest = self.last_message_timestamps.get(target_group, 0) + self.slowmode_cache.get(target_group, 0)
+        restriction_until = self._get_chat_restriction_until(target_group)
+        if restriction_until:
+            earliest = max(earliest, restriction_until.timestamp())
+        return earliest
+
+    async def send_at(self, command: str, go_time: datetime, target_chat_id: int = None, reply_to: int = None,
+                      expect_reply: bool = False, timeout: int = None) -> tuple[Message, Message | None, float]:
+        """
+        在指定时刻发送指令，用于需要多账号同步执行的场景 (如集火交易)。
+        - 提前在目标通道登记预约，临近截止时间时普通指令让路，不会占用冷却窗口。
+        - 使用 loop.call_at 精确唤醒后直接发送，不经过通道队列。
+        返回 (指令消息, 回复消息或 None, 实际发送时刻相对 go_time 的偏差秒数)。
+        """
+        target_group = self._resolve_target_chat(target_chat_id)
+        deadline = go_time.timestamp()
+        reservation = {'deadline': deadline, 'done': asyncio.Event()}
+        self.lane_reservations.setdefault(target_group, []).append(reservation)
+        self._invalidate_queries_for(command)
+
+        sent_message = None
+        try:
+            loop = asyncio.get_running_loop()
+            fire = asyncio.Event()
+            handle = loop.call_at(loop.time() + max(0.0, deadline - time.time()), fire.set)
+            try:
+                await fire.wait()
+            finally:
+                handle.cancel()
+
+            hard_wait = self._hard_sendable_timestamp(target_group) - time.time()
+            if hard_wait > 0:
+                await asyncio.sleep(hard_wait)
+
+            send_started = time.time()
+            sent_message = await self._send_now(target_group, command, reply_to)
+            skew = send_started - deadline
+            format_and_log(LogType.TASK, "定时发送", {
+                '指令': command, '目标时刻': go_time.isoformat(), '偏差(毫秒)': f"{skew * 1000:.1f}",
+                '发送耗时(毫秒)': f"{(time.time() - send_started) * 1000:.1f}"
+            })
+        finally:
+            reservation['done'].set()
+            reservations = self.lane_reservations.get(target_group, [])
+            if reservation in reservations:
+                reservations.remove(reservation)
+
+        if not expect_reply:
+            strategy = settings.AUTO_DELETE_STRATEGIES['fire_and_forget']
+            self._schedule_message_deletion(sent_message, strategy['delay_self'], "游戏指令(定时发送)")
+            return sent_message, None, skew
+
+        strategy = settings.AUTO_DELETE_STRATEGIES['request_response']
+        future = asyncio.Future()
+        self.reply_waiters.add_reply_waiter(sent_message.id, future)
+        sent_at = time.monotonic()
+        try:
+            reply_message = await asyncio.wait_for(future, timeout=timeout or settings.COMMAND_TIMEOUT)
+            latency_stats.record(command, 'reply', time.monotonic() - sent_at)
+            self._schedule_message_deletion(sent_message, strategy['delay_self_on_reply'], "游戏指令(定时-成功)")
+            return sent_message, reply_message, skew
+        except asyncio.TimeoutError as e:
+            self._schedule_message_deletion(sent_message, strategy['delay_self_on_timeout'], "游戏指令(定时-超时)")
+            raise CommandTimeoutError(f"等待指令 '{command}' 的回复超时。", sent_message) from e
+        finally:
+            self.reply_waiters.remove_reply_waiter(sent_message.id)
 
     async def _send_command_and_get_message(self, command: str, reply_to: int = None,
                                            target_chat_id: int = None, post_send_callback=None, priority: int = 1):
+        lane = self._get_send_lane(self._resolve_target_chat(target_chat_id))
+        if not game_adaptor.is_idempotent_query(command):
+            self._invalidate_queries_for(command)
         future = asyncio.Future()
-        item = (command, reply_to, future, target_chat_id, post_send_callback)
-        task = asyncio.create_task(self.message_queue.put((priority, item)))
+        item = (command, reply_to, future, post_send_callback, time.monotonic())
+        # 序号保证同优先级按入队顺序发送，且避免比较元组中不可比较的元素
+        task = asyncio.create_task(lane.put((priority, next(self._send_sequence), item)))
 
         if post_send_callback is None:
             await future
@@ -159,6 +376,15 @@ class TelegramClient:
         else:
             return task
 
+    @staticmethod
+    def _invalidate_queries_for(command: str):
+        """可能改变游戏状态的指令会让相关查询的缓存失去可信度；无法判断影响范围时全部作废。"""
+        affected = game_adaptor.get_affected_queries(command)
+        if affected is None:
+            query_cache.clear()
+        else:
+            query_cache.invalidate(*affected)
+
     async def send_game_command_fire_and_forget(self, command: str, reply_to: int = None, target_chat_id: int = None, priority: int = 1):
         strategy = settings.AUTO_DELETE_STRATEGIES['fire_and_forget']
         
@@ -174,7 +400,35 @@ class TelegramClient:
         put_task.add_done_callback(self.fire_and_forget_tasks.discard)
 
 
-    async def send_game_command_request_response(self, command: str, reply_to: int = None, timeout: int = None, target_chat_id: int = None, priority: int = 1) -> tuple[Message, Message]:
+    async def send_game_command_request_response(self, command: str, reply_to: int = None, timeout: int = None, target_chat_id: int = None, priority: int = 1, use_cache: bool = True) -> tuple[Message, Message]:
+        query_name = game_adaptor.get_query_name(command) if reply_to is None else None
+        if query_name:
+            key = (self._resolve_target_chat(target_chat_id), command.strip())
+            if use_cache and (cached := query_cache.get(key)):
+                format_and_log(LogType.DEBUG, "查询缓存", {'指令': command, '状态': '命中'}, level=logging.DEBUG)
+                return cached
+            generation = query_cache.generation(query_name)
+            shared, started_generation = self._inflight_queries.get(key, (None, None))
+            # 相关状态在查询发出后被改变过时，进行中的请求可能拿到旧回复，不再复用
+            if shared is None or started_generation != generation:
+                shared = asyncio.ensure_future(self._request_response(command, reply_to, timeout, target_chat_id, priority))
+                self._inflight_queries[key] = (shared, generation)
+                shared.add_done_callback(
+                    lambda f, k=key, q=query_name, g=generation: self._finish_inflight_query(k, q, g, f))
+            else:
+                format_and_log(LogType.DEBUG, "查询合并", {'指令': command, '状态': '复用进行中的请求'}, level=logging.DEBUG)
+            # shield: 单个调用方被取消时，不影响其他共享同一请求的调用方
+            return await asyncio.shield(shared)
+        return await self._request_response(command, reply_to, timeout, target_chat_id, priority)
+
+    def _finish_inflight_query(self, key, query_name: str, generation: tuple, future: asyncio.Future):
+        if self._inflight_queries.get(key, (None,))[0] is future:
+            self._inflight_queries.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            # 查询期间相关缓存被作废过时，set 会丢弃这份可能已过期的结果
+            query_cache.set(key, query_name, future.result(), generation)
+
+    async def _request_response(self, command: str, reply_to: int = None, timeout: int = None, target_chat_id: int = None, priority: int = 1) -> tuple[Message, Message]:
         strategy = settings.AUTO_DELETE_STRATEGIES['request_response']
         sent_message = None
         try:
@@ -185,26 +439,39 @@ class TelegramClient:
             if e.sent_message: self._schedule_message_deletion(e.sent_message, strategy['delay_self_on_timeout'], "游戏指令(问答-超时)")
             raise e
 
+    async def send_game_commands_pipelined(self, commands: list[str], timeout: int = None, target_chat_id: int = None,
+                                           priority: int = 1, max_in_flight: int = None) -> list:
+        """
+        流水线式批量问答：适用于彼此独立、且游戏会直接回复指令消息的一批指令。
+        - 指令按顺序连续入队，只受发送冷却约束，不必等上一条的回复再发下一条。
+        - 回复按被回复的消息ID并发等待；同时未收到回复的指令数不超过 max_in_flight。
+        返回与 commands 顺序一致的列表，每项为 (指令消息, 回复消息) 或该指令引发的异常。
+        """
+        max_in_flight = max_in_flight or settings.PERFORMANCE_CONFIG.get('pipeline_max_in_flight', 5)
+        in_flight = asyncio.Semaphore(max_in_flight)
+
+        async def _run_one(command: str):
+            async with in_flight:
+                return await self._request_response(command, timeout=timeout, target_chat_id=target_chat_id, priority=priority)
+
+        format_and_log(LogType.TASK, "流水线问答", {'指令数量': len(commands), '最大并发': max_in_flight})
+        return await asyncio.gather(*(_run_one(command) for command in commands), return_exceptions=True)
+
     async def send_and_wait_for_mention_reply(self, command: str, final_pattern: str, timeout: int = None, target_chat_id: int = None, priority: int = 1) -> tuple[Message, Message]:
         strategy = settings.AUTO_DELETE_STRATEGIES['request_response']
         sent_message = None
         waiter_id = None
         try:
             sent_message = await self._send_command_and_get_message(command, target_chat_id=target_chat_id, priority=priority)
+            sent_at = time.monotonic()
             
             future = asyncio.Future()
-            waiter_id = f"{time.time()}-{random.randint(1000, 9999)}"
-
             my_display_name = get_display_name(self.me)
             mention_pattern = f"@{self.me.username}" if self.me.username else re.escape(my_display_name)
-
-            self.pending_mention_replies[waiter_id] = {
-                'future': future,
-                'mention_pattern': mention_pattern,
-                'final_pattern': final_pattern
-            }
+            waiter_id = self.reply_waiters.add_mention_waiter(future, mention_pattern, final_pattern)
             
             final_message = await asyncio.wait_for(future, timeout=timeout or settings.COMMAND_TIMEOUT)
+            latency_stats.record(command, 'reply', time.monotonic() - sent_at)
             
             self._schedule_message_deletion(sent_message, strategy['delay_self_on_reply'], "游戏指令(提及-成功)")
             return sent_message, final_message
@@ -214,8 +481,8 @@ class TelegramClient:
                 self._schedule_message_deletion(sent_message, strategy['delay_self_on_timeout'], "游戏指令(提及-超时)")
             raise CommandTimeoutError(f"等待指令 '{command}' 的最终@提及回复超时。", sent_message) from e
         finally:
-            if waiter_id:
-                self.pending_mention_replies.pop(waiter_id, None)
+            if waiter_id is not None:
+                self.reply_waiters.remove_mention_waiter(waiter_id)
 
     async def send_and_wait_for_channel_edit(self, command: str, initial_pattern: str, final_pattern: str, from_user_ids: list = None, timeout: int = None, target_chat_id: int = None, priority: int = 1) -> tuple[Message, Message]:
         """
@@ -227,20 +494,14 @@ class TelegramClient:
         
         try:
             sent_message = await self._send_command_and_get_message(command, target_chat_id=target_chat_id, priority=priority)
+            sent_at = time.monotonic()
             
             future = asyncio.Future()
-            waiter_id = f"edit_{time.time()}-{random.randint(1000, 9999)}"
-
-            self.pending_edits[waiter_id] = {
-                'future': future,
-                'initial_pattern': initial_pattern,
-                'final_pattern': final_pattern,
-                'from_user_ids': from_user_ids or settings.GAME_BOT_IDS,
-                'initial_candidate': None,
-                'final_candidate': None,
-            }
+            waiter_id = self.reply_waiters.add_edit_waiter(
+                future, initial_pattern, final_pattern, from_user_ids or settings.GAME_BOT_IDS)
             
             final_message = await asyncio.wait_for(future, timeout=timeout or settings.COMMAND_TIMEOUT)
+            latency_stats.record(command, 'reply', time.monotonic() - sent_at)
             
             self._schedule_message_deletion(sent_message, strategy['delay_self_on_reply'], "游戏指令(编辑-成功)")
             return sent_message, final_message
@@ -250,30 +511,34 @@ class TelegramClient:
                 self._schedule_message_deletion(sent_message, strategy['delay_self_on_timeout'], "游戏指令(编辑-超时)")
             raise CommandTimeoutError(f"等待指令 '{command}' 的编辑回复超时。", sent_message) from e
         finally:
-            if waiter_id:
-                self.pending_edits.pop(waiter_id, None)
+            if waiter_id is not None:
+                self.reply_waiters.remove_edit_waiter(waiter_id)
 
     async def _send_and_wait_for_response(self, command: str, final_pattern: str = ".*", timeout: int = None, reply_to: int = None, target_chat_id: int = None, priority: int = 1) -> tuple[Message, Message]:
         timeout = timeout or settings.COMMAND_TIMEOUT; sent_message = None
         try:
             sent_message = await self._send_command_and_get_message(command, reply_to, target_chat_id, post_send_callback=None, priority=priority)
+            sent_at = time.monotonic()
             future = asyncio.Future()
-            self.pending_replies[sent_message.id] = {'future': future, 'pattern': final_pattern}
+            self.reply_waiters.add_reply_waiter(sent_message.id, future, final_pattern)
             reply_message = await asyncio.wait_for(future, timeout=timeout)
+            latency_stats.record(command, 'reply', time.monotonic() - sent_at)
             return sent_message, reply_message
         except asyncio.TimeoutError as e:
             raise CommandTimeoutError(f"等待指令 '{command}' 的回复超时。", sent_message) from e
         finally:
-            if sent_message: self.pending_replies.pop(sent_message.id, None)
+            if sent_message: self.reply_waiters.remove_reply_waiter(sent_message.id)
 
     async def start(self):
         await self.client.start()
         self.me = await self.client.get_me()
+        self.message_hub.set_identity(self.me)
+        sender_cache.put(self.me.id, self.me)
         my_name = get_display_name(self.me)
         identity = "主控账号 (Admin)" if str(self.me.id) == str(self.admin_id) else "辅助账号 (Helper)"
         format_and_log(LogType.SYSTEM, "客户端状态", {'状态': '已成功连接', '当前用户': f"{my_name} (ID: {self.me.id})", '识别身份': identity})
         await self._load_timestamps()
-        asyncio.create_task(self._message_sender_loop())
+        await self.deletion_scheduler.load(data_manager.db, f"{PENDING_DELETIONS_KEY}:{self.me.id}")
 
     async def _cache_chat_info(self):
         all_groups = set(settings.GAME_GROUP_IDS + ([settings.CONTROL_GROUP_ID] if settings.CONTROL_GROUP_ID else []))
@@ -286,6 +551,8 @@ class TelegramClient:
                     full_channel = await self.client(GetFullChannelRequest(channel=entity))
                     self.slowmode_cache[int(group_id)] = getattr(full_channel.full_chat, 'slowmode_seconds', 0) or 0
                 else: self.slowmode_cache[int(group_id)] = 0
+                if self.me:
+                    self._set_chat_restriction(group_id, await self.get_participant_info(group_id, self.me.id))
             except Exception as e:
                 self.group_name_cache[int(group_id)] = f"ID:{group_id} (获取名称失败)"; self.slowmode_cache[int(group_id)] = 0
                 logging.warning(f"获取群组 {group_id} 的完整信息失败: {e}")
@@ -301,43 +568,40 @@ class TelegramClient:
     async def send_admin_notification(self, message: str, target_id: int = None):
         target = target_id or settings.CONTROL_GROUP_ID or self.admin_id
         try:
-            await self.client.send_message(target, message, parse_mode='md')
+            await rate_limiter.run('send', lambda: self.client.send_message(target, message, parse_mode='md'))
         except Exception as e:
             format_and_log(LogType.ERROR, "发送管理员通知失败", {'目标ID': target, '错误': str(e)}, level=logging.ERROR)
 
-    async def _sleep_and_delete(self, delay: int, message: Message):
-        await asyncio.sleep(delay)
-        task_key = (message.chat_id, message.id)
-        if task_key in self._pinned_messages or task_key not in self.deletion_tasks:
-            self.deletion_tasks.pop(task_key, None)
-            return
+    async def edit_message(self, entity, message=None, text=None, **kwargs):
+        """经全局限流器的编辑消息入口，参数与 Telethon 的 edit_message 相同。"""
+        return await rate_limiter.run('edit', lambda: self.client.edit_message(entity, message, text, **kwargs))
+
+    async def delete_messages(self, entity, message_ids: list):
+        """经全局限流器的删除消息入口。"""
+        return await rate_limiter.run('delete', lambda: self.client.delete_messages(entity=entity, message_ids=message_ids))
+
+    async def _delete_message_batch(self, chat_id: int, message_ids: list):
+        message_ids = [mid for mid in message_ids if (chat_id, mid) not in self._pinned_messages]
+        if not message_ids: return
         try:
-            await self.client.delete_messages(entity=message.chat_id, message_ids=[message.id])
+            await self.delete_messages(chat_id, message_ids)
         except MessageDeleteForbiddenError:
-            format_and_log(LogType.ERROR, "删除失败 (权限不足)", {'消息ID': message.id}, level=logging.ERROR)
-        except Exception as e:
-            format_and_log(LogType.ERROR, "删除失败 (异常)", {'消息ID': message.id, '错误': str(e)}, level=logging.ERROR)
-        finally:
-            self.deletion_tasks.pop(task_key, None)
+            format_and_log(LogType.ERROR, "删除失败 (权限不足)", {'群组ID': chat_id, '消息ID': message_ids}, level=logging.ERROR)
 
     def _schedule_message_deletion(self, message: Message, delay_seconds: int, reason: str = "未指定"):
         if not settings.AUTO_DELETE.get('enabled', False) or not message or delay_seconds <= 0: return
-        task_key = (message.chat_id, message.id)
-        if task_key in self._pinned_messages: return
-        if task_key in self.deletion_tasks: self.deletion_tasks[task_key].cancel()
-        task = asyncio.create_task(self._sleep_and_delete(delay_seconds, message))
-        self.deletion_tasks[task_key] = task
+        if (message.chat_id, message.id) in self._pinned_messages: return
+        self.deletion_scheduler.schedule(message.chat_id, message.id, delay_seconds)
 
     async def _cancel_message_deletion(self, message: Message):
         if not message: return
-        if task := self.deletion_tasks.pop((message.chat_id, message.id), None): task.cancel()
+        self.deletion_scheduler.cancel(message.chat_id, message.id)
 
     def pin_message(self, message: Message, permanent: bool = False):
         if not message: return
         task_key = (message.chat_id, message.id)
         self._pinned_messages.add(task_key)
-        if task := self.deletion_tasks.pop(task_key, None):
-            task.cancel()
+        if self.deletion_scheduler.cancel(*task_key):
             if not permanent:
                 self.unpin_message(message)
 
@@ -355,51 +619,18 @@ class TelegramClient:
         if not hasattr(event, 'message') or not hasattr(event.message, 'text') or not event.message.text: return
         log_type = LogType.MSG_SENT_SELF if event.out else LogType.MSG_RECV
         if isinstance(event, events.MessageEdited.Event): log_type = LogType.MSG_EDIT
-        await log_telegram_event(self, log_type, event); self.last_update_timestamp = datetime.now(pytz.timezone(settings.TZ))
-        
-        # --- 统一的等待任务处理器 ---
-        
-        # 1. 处理基于 reply_to_msg_id 的等待
-        if isinstance(event, events.NewMessage.Event) and event.is_reply:
-            if wait_obj := self.pending_replies.get(event.reply_to_msg_id):
-                if not wait_obj['future'].done() and re.search(wait_obj['pattern'], event.text, re.DOTALL):
-                    wait_obj['future'].set_result(event.message)
-        
-        # 2. 处理基于 @提及 的等待
-        waiters_to_remove_mention = []
-        for waiter_id, wait_obj in self.pending_mention_replies.items():
-            if not wait_obj['future'].done():
-                if re.search(wait_obj['mention_pattern'], event.text) and re.search(wait_obj['final_pattern'], event.text, re.DOTALL):
-                    wait_obj['future'].set_result(event.message)
-                    waiters_to_remove_mention.append(waiter_id)
-        for waiter_id in waiters_to_remove_mention:
-            self.pending_mention_replies.pop(waiter_id, None)
-
-        # 3. [核心修改] 处理新的、能抵抗乱序的编辑等待
-        waiters_to_remove_edit = []
-        for waiter_id, wait_obj in list(self.pending_edits.items()):
-            if wait_obj['future'].done():
-                continue
-
-            # 检查事件是否是初始回复的候选者
-            if isinstance(event, events.NewMessage.Event) and not wait_obj['initial_candidate']:
-                if event.sender_id in wait_obj['from_user_ids'] and re.search(wait_obj['initial_pattern'], event.text, re.DOTALL):
-                    wait_obj['initial_candidate'] = event.message
-            
-            # 检查事件是否是最终编辑的候选者
-            if isinstance(event, events.MessageEdited.Event):
-                if re.search(wait_obj['final_pattern'], event.text, re.DOTALL):
-                    wait_obj['final_candidate'] = event.message
-            
-            # 双向匹配检查
-            if wait_obj['initial_candidate'] and wait_obj['final_candidate']:
-                if wait_obj['initial_candidate'].id == wait_obj['final_candidate'].id:
-                    wait_obj['future'].set_result(wait_obj['final_candidate'])
-                    waiters_to_remove_edit.append(waiter_id)
+        message_cache.put(event.message)
+        if event.chat_id in self._configured_groups:
+            await log_telegram_event(self, log_type, event); self.last_update_timestamp = datetime.now(pytz.timezone(settings.TZ))
 
-        for waiter_id in waiters_to_remove_edit:
-            self.pending_edits.pop(waiter_id, None)
+            # --- 统一的等待任务处理器 (按索引只匹配可能被满足的等待者) ---
+            is_edit = isinstance(event, events.MessageEdited.Event)
+            self.reply_waiters.dispatch(
+                event.message, is_edit=is_edit, sender_id=event.sender_id,
+                reply_to_msg_id=event.reply_to_msg_id if event.is_reply else None
+            )
 
+        await self.message_hub.dispatch_event(event)
 
     async def _deleted_message_handler(self, update):
         chat_id = None
@@ -410,3 +641,15 @@ class TelegramClient:
             self.last_update_timestamp = datetime.now(pytz.timezone(settings.TZ))
             fake_event = type('FakeEvent', (object,), {'chat_id': chat_id})
             await log_telegram_event(self, LogType.MSG_DELETE, fake_event, deleted_ids=update.messages)
+
+    async def _chat_state_update_handler(self, update):
+        """根据服务器推送的频道/参与者变更，保持发言限制缓存为最新。"""
+        chat_id = int(f"-100{update.channel_id}")
+        if chat_id not in self.slowmode_cache and chat_id not in self.chat_restrictions:
+            return
+        if isinstance(update, UpdateChannelParticipant):
+            if not self.me or update.user_id != self.me.id:
+                return
+            self._set_chat_restriction(chat_id, self._extract_until_date(update.new_participant))
+        elif isinstance(update, UpdateChannel):
+            self._schedule_chat_state_refresh(chat_id)
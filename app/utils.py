@@ -4,6 +4,7 @@ import functools
 import json
 import logging
 import re
+import time
 from contextlib import asynccontextmanager
 from datetime import timedelta
 
@@ -12,6 +13,7 @@ from telethon.tl.types import Message
 
 from app.context import get_application
 from app.logging_service import LogType, format_and_log
+from app.rate_limiter import rate_limiter
 from config import settings
 
 
@@ -43,9 +45,18 @@ async def progress_manager(event, initial_message: str):
         # client.pin_message(progress_message)
 
         class ProgressUpdater:
+            """
+            合并式进度更新：只保留最新的待发文本，两次编辑之间至少间隔
+            performance.progress_edit_interval_ms 毫秒，文本未变化时不发起编辑。
+            """
             def __init__(self, msg):
                 self._msg = msg
                 self._final_text = ""
+                self._rendered_text = msg.text if msg else None
+                self._pending_text = None
+                self._last_edit_at = 0.0
+                self._flush_task = None
+                self._interval = settings.PERFORMANCE_CONFIG.get('progress_edit_interval_ms', 1500) / 1000
 
             @property
             def message(self):
@@ -53,22 +64,50 @@ async def progress_manager(event, initial_message: str):
 
             async def update(self, text: str):
                 self._final_text = text
+                if not self._msg:
+                    return
+                if text == self._rendered_text:
+                    self._pending_text = None
+                    return
+                self._pending_text = text
+                if self._flush_task and not self._flush_task.done():
+                    return
+                remaining = self._last_edit_at + self._interval - time.monotonic()
+                if remaining <= 0:
+                    await self._flush()
+                else:
+                    self._flush_task = asyncio.create_task(self._delayed_flush(remaining))
+
+            async def _delayed_flush(self, delay: float):
+                await asyncio.sleep(delay)
+                await self._flush()
+
+            async def _flush(self):
+                text, self._pending_text = self._pending_text, None
+                if not self._msg or text is None or text == self._rendered_text:
+                    return
+                self._last_edit_at = time.monotonic()
                 try:
-                    if self._msg and self._msg.text != text:
-                        await self._msg.edit(text)
-                except (MessageEditTimeExpiredError, MessageNotModifiedError):
-                    self._msg = None 
+                    await client.edit_message(self._msg, text)
+                    self._rendered_text = text
+                except MessageNotModifiedError:
+                    self._rendered_text = text
+                except MessageEditTimeExpiredError:
+                    self._msg = None
                 except Exception:
                     pass
             
             async def _finalize(self):
                 """在上下文退出时调用，确保最终消息被设置"""
+                if self._flush_task and not self._flush_task.done():
+                    self._flush_task.cancel()
+                self._pending_text = None
                 if not self._msg:
                      if self._final_text:
                         await client.reply_to_admin(event, self._final_text)
-                elif self._final_text and self._msg.text != self._final_text:
+                elif self._final_text and self._rendered_text != self._final_text:
                     try:
-                        await self._msg.edit(self._final_text)
+                        await client.edit_message(self._msg, self._final_text)
                     except MessageNotModifiedError:
                         # [修复] 优雅地忽略“消息未修改”错误
                         pass
@@ -85,7 +124,7 @@ async def progress_manager(event, initial_message: str):
         error_text = create_error_reply("指令执行", "任务执行期间发生意外错误", details=str(e))
         if progress_message:
             try:
-                await progress_message.edit(error_text)
+                await client.edit_message(progress_message, error_text)
             except Exception:
                 await client.reply_to_admin(event, error_text)
         else:
@@ -205,14 +244,14 @@ async def send_paginated_message(event, text: str, max_length: int = 3500, prefi
     
     if not chunks:
         if prefix_message:
-            await prefix_message.edit("（无内容）")
+            await client.edit_message(prefix_message, "（无内容）")
         return
 
     last_message = None
     
     if prefix_message:
         try:
-            await prefix_message.edit(chunks[0])
+            await client.edit_message(prefix_message, chunks[0])
             last_message = prefix_message
         except Exception:
             last_message = await client.reply_to_admin(event, chunks[0])
@@ -221,7 +260,7 @@ async def send_paginated_message(event, text: str, max_length: int = 3500, prefi
 
     if last_message:
         for chunk in chunks[1:]:
-            new_message = await last_message.reply(chunk)
+            new_message = await rate_limiter.run('send', lambda: last_message.reply(chunk))
             client._schedule_message_deletion(new_message, settings.AUTO_DELETE.get('delay_admin_command'), "分页消息")
             last_message = new_message
 
@@ -15,6 +15,8 @@ DATA_DIR = 'data'
 LOG_FILE = 'logs/app.log'
 ERROR_LOG_FILE = 'logs/error.log'
 RAW_LOG_FILE = 'logs/raw_messages.log'
+RAW_ARCHIVE_DIR = 'logs/raw_archive'
+LOG_INDEX_DB = 'logs/log_index.sqlite'
 
 try:
     with open(CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
@@ -82,11 +84,48 @@ TAIYI_SECT_CONFIG = config.get('taiyi_sect', {})
 XUANGU_EXAM_CONFIG = config.get('xuangu_exam_solver', {})
 TIANJI_EXAM_CONFIG = config.get('tianji_exam_solver', {})
 LOG_ROTATION_CONFIG = config.get('log_rotation', {})
+# [新增] 原始消息的 JSONL 归档 (与 raw_messages.log 并行或替代)
+RAW_ARCHIVE_CONFIG = _merge_config('raw_archive', {
+    'enabled': False,
+    'keep_text_log': True,
+    'rotate_minutes': 60,
+    'max_bytes': 50 * 1024 * 1024,
+    'compression': 'gzip',
+})
+# [新增] 本地日志全文索引 (供 ,查日志 指令检索)
+LOG_INDEX_CONFIG = _merge_config('log_index', {
+    'enabled': False,
+    'retention_days': 7,
+})
 TRADE_COORDINATION_CONFIG = _merge_config('trade_coordination', {})
 HEARTBEAT_CONFIG = _merge_config('heartbeat', {})
 BROADCAST_CONFIG = config.get('broadcast', {})
 AUTO_RESOURCE_MANAGEMENT = config.get('auto_resource_management', {})
 AUTO_KNOWLEDGE_SHARING = config.get('auto_knowledge_sharing', {})
+# [新增] 发送链路性能相关的微调参数
+PERFORMANCE_CONFIG = _merge_config('performance', {
+    'chat_state_ttl_seconds': 300,
+    'max_concurrent_sends': 3,
+    'rate_limits': {},
+    'timestamp_flush_interval_seconds': 5,
+    'deadline_guard_seconds': 1,
+    'progress_edit_interval_ms': 1500,
+    'latency_samples': 500,
+    'pipeline_max_in_flight': 5,
+    'message_cache_size': 2000,
+    'sender_name_ttl_seconds': 3600,
+    'sender_name_cache_size': 5000,
+    'redis_inbox_size': 500,
+    'redis_task_concurrency': {'default': 4},
+    'redis_overload_policy': 'block',
+    'redis_coalesce_task_types': ['query_state', 'report_state'],
+    'log_queue_size': 10000,
+    'log_flush_interval_ms': 200,
+    'query_cache_ttl': {
+        'get_inventory': 30, 'get_profile': 120, 'get_sect_treasury': 120,
+        'get_formation_info': 300, 'get_my_stall': 30, 'get_nascent_soul_status': 60,
+    },
+})
 
 SESSION_FILE_PATH = f'{DATA_DIR}/user.session'
 SCHEDULER_DB = f'sqlite:///{DATA_DIR}/jobs.sqlite'
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+原始日志回放与解析器基准工具
+
+读取 log_telegram_event 写出的 raw_messages.log (含轮转出的 .1/.2 等文件)
+或 JSONL 归档分段 (logs/raw_archive/*.jsonl[.gz|.zst])，
+将其中的消息整理为 (文本, 被回复消息文本) 语料，回放给各个解析器：
+- 统计整体吞吐 (条/秒) 与每个解析器的耗时；
+- 与黄金文件比对解析结果，报告任何变化。
+
+用法:
+    python replay_parsers.py                              # 回放默认日志并与黄金文件比对
+    python replay_parsers.py logs/raw_messages.log.1 ...  # 指定日志文件
+    python replay_parsers.py --update-golden              # 以本次结果覆盖黄金文件
+    python replay_parsers.py --save-corpus corpus.jsonl   # 另存整理后的语料
+    python replay_parsers.py --corpus corpus.jsonl        # 直接回放已保存的语料
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+# --- 安全检查：确保在项目根目录运行 ---
+if not os.path.isdir('config') or not os.path.isdir('app'):
+    print("错误：请在项目根目录 (tg-game-helper/) 中运行此脚本。")
+    sys.exit(1)
+
+from config import settings
+from app import event_parsers
+from app.game_adaptors.mortal_cultivation_adaptor import MortalCultivationAdaptor
+from app.utils import parse_inventory_text
+from app.plugins.huangfeng_valley import _parse_garden_status
+from app.plugins.sect_treasury import _parse_treasury_text
+from app.plugins.xuangu_exam_solver import XuanguExamSolver
+from app.plugins.tianji_exam_solver import TianjiExamSolver
+
+print("--- TG Game Helper 解析器回放工具 ---")
+
+DEFAULT_GOLDEN_FILE = 'logs/parser_golden.json'
+
+# --- 原始日志格式 (见 logging_service.log_telegram_event 与 core 中的 raw_log_formatter) ---
+ENTRY_START_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} \S+ - (?=时间: )", re.M)
+TITLE_RE = re.compile(r"^(新消息|消息编辑) \(ID: (\d+)\)$")
+SOURCE_RE = re.compile(r"^来源: .*?\((-?\d+)\)(?: \(话题: .*\))?$")
+SENDER_RE = re.compile(r"^用户: .*\((-?\d+|N/A|None)\)$")
+REPLY_RE = re.compile(r"^回复至消息ID: (\d+)$")
+CONTENT_END = "\n" + "─" * 50
+
+
+def print_section_header(title):
+    """打印一个美化的分段标题"""
+    print("\n" + "="*60)
+    print(f" {title.center(58)} ")
+    print("="*60)
+
+
+def _parse_entry(entry: str) -> dict | None:
+    """解析一条原始日志记录，只保留带消息ID的新消息/编辑事件。"""
+    head, sep, content = entry.partition("\n内容:\n")
+    if not sep:
+        return None
+    end = content.rfind(CONTENT_END)
+    if end != -1:
+        content = content[:end]
+
+    record = {'id': None, 'chat_id': None, 'sender_id': None, 'is_edit': False, 'reply_to': None}
+    for line in head.split("\n")[1:]:
+        if match := TITLE_RE.match(line):
+            record['is_edit'] = match.group(1) == "消息编辑"
+            record['id'] = int(match.group(2))
+        elif match := SOURCE_RE.match(line):
+            record['chat_id'] = int(match.group(1))
+        elif match := SENDER_RE.match(line):
+            record['sender_id'] = int(match.group(1)) if match.group(1).lstrip('-').isdigit() else None
+        elif match := REPLY_RE.match(line):
+            record['reply_to'] = int(match.group(1))
+    if record['id'] is None:
+        return None
+    record['text'] = content
+    return record
+
+
+def _open_text(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    if path.endswith('.zst'):
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb')), encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def _iter_archive_entries(path: str):
+    """JSONL 归档：发送的指令只用于补全回复上下文，不计入语料。"""
+    with _open_text(path) as f:
+        for line in f:
+            event = json.loads(line) if line.strip() else {}
+            if event.get('msg_id') is None or event.get('type') == 'MSG_DELETE':
+                continue
+            record = {
+                'id': event['msg_id'], 'chat_id': event.get('chat_id'), 'sender_id': event.get('sender_id'),
+                'is_edit': bool(event.get('is_edit')), 'reply_to': event.get('reply_to'), 'text': event.get('text') or "",
+            }
+            yield record, event.get('type') != 'CMD_SENT'
+
+
+def _iter_text_entries(path: str):
+    with _open_text(path) as f:
+        data = f.read()
+    starts = [m.end() for m in ENTRY_START_RE.finditer(data)]
+    bounds = [m.start() for m in ENTRY_START_RE.finditer(data)][1:] + [len(data)]
+    for start, end in zip(starts, bounds):
+        record = _parse_entry(data[start:end])
+        if record is not None:
+            yield record, True
+
+
+def load_raw_logs(paths: list) -> list:
+    """按时间顺序读取日志文件并生成语料，被回复消息的文本从此前出现的同会话消息中补全。"""
+    records, texts_by_id = [], {}
+    for path in paths:
+        is_archive = re.search(r"\.jsonl(\.gz|\.zst)?$", path)
+        for record, in_corpus in (_iter_archive_entries(path) if is_archive else _iter_text_entries(path)):
+            if not in_corpus:
+                texts_by_id[(record['chat_id'], record['id'])] = record['text']
+                continue
+            record['reply_text'] = texts_by_id.get((record['chat_id'], record['reply_to'])) if record['reply_to'] else None
+            texts_by_id[(record['chat_id'], record['id'])] = record['text']
+            records.append(record)
+    return records
+
+
+def load_corpus(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_corpus(path: str, records: list):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _record_key(index: int, record: dict) -> str:
+    kind = "edit" if record.get('is_edit') else "new"
+    return f"{record.get('chat_id')}:{record.get('id')}:{kind}:{index}"
+
+
+# --- 待回放的解析器：名称 -> 以语料记录为参数的调用 ---
+_adaptor = MortalCultivationAdaptor()
+# 求解器的构造函数需要客户端与数据库，这里只借用其无状态的解析方法
+_xuangu_solver = XuanguExamSolver.__new__(XuanguExamSolver)
+_tianji_solver = TianjiExamSolver.__new__(TianjiExamSolver)
+
+PARSERS = {
+    'dispatch_and_parse': lambda r: event_parsers.dispatch_and_parse(r['text'], r.get('reply_text')),
+    'parse_profile': lambda r: _adaptor.parse_profile(r['text']),
+    'parse_inventory_text': lambda r: parse_inventory_text(SimpleNamespace(text=r['text'])),
+    '_parse_garden_status': lambda r: _parse_garden_status(SimpleNamespace(text=r['text'])),
+    '_parse_treasury_text': lambda r: _parse_treasury_text(r['text']),
+    'xuangu_extract_question_options': lambda r: _xuangu_solver.extract_question_options(SimpleNamespace(text=r['text'])),
+    'tianji_extract_question_options': lambda r: _tianji_solver.extract_question_options(SimpleNamespace(text=r['text'])),
+}
+
+
+def _normalize(value):
+    """统一为可比对的 JSON 结构 (如 int 键转为字符串)。"""
+    return json.loads(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def replay(records: list, rounds: int) -> tuple[dict, dict, float]:
+    """回放语料，返回 (解析结果, 每个解析器的累计耗时, 总耗时)。"""
+    timings = {name: 0.0 for name in PARSERS}
+    results = {}
+    started = time.perf_counter()
+    for round_index in range(rounds):
+        for index, record in enumerate(records):
+            outputs = {}
+            for name, parser in PARSERS.items():
+                t0 = time.perf_counter()
+                try:
+                    value = parser(record)
+                except Exception as e:
+                    value = {'__error__': f"{type(e).__name__}: {e}"}
+                timings[name] += time.perf_counter() - t0
+                outputs[name] = value
+            if round_index == 0:
+                results[_record_key(index, record)] = _normalize(outputs)
+    return results, timings, time.perf_counter() - started
+
+
+def compare_with_golden(results: dict, golden: dict, max_report: int) -> int:
+    """逐条比对解析结果，打印差异并返回存在变化的记录数。"""
+    changed = 0
+    for key in sorted(set(results) | set(golden)):
+        old, new = golden.get(key), results.get(key)
+        if old == new:
+            continue
+        changed += 1
+        if changed > max_report:
+            continue
+        if old is None or new is None:
+            print(f"  - [{key}] {'新增记录' if old is None else '记录缺失'}")
+            continue
+        for name in sorted(set(old) | set(new)):
+            if old.get(name) != new.get(name):
+                print(f"  - [{key}] {name}")
+                print(f"      旧: {json.dumps(old.get(name), ensure_ascii=False)[:300]}")
+                print(f"      新: {json.dumps(new.get(name), ensure_ascii=False)[:300]}")
+    if changed > max_report:
+        print(f"  ... 另有 {changed - max_report} 条变化未显示")
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放原始日志，对解析器做基准测试与回归比对。")
+    parser.add_argument('logs', nargs='*', help=f"原始日志文件或 JSONL 归档分段 (默认: {settings.RAW_LOG_FILE})")
+    parser.add_argument('--corpus', help="直接读取已保存的语料 (JSONL)，忽略日志文件")
+    parser.add_argument('--save-corpus', help="将整理后的语料另存为 JSONL")
+    parser.add_argument('--golden', default=DEFAULT_GOLDEN_FILE, help=f"黄金文件路径 (默认: {DEFAULT_GOLDEN_FILE})")
+    parser.add_argument('--update-golden', action='store_true', help="以本次解析结果覆盖黄金文件")
+    parser.add_argument('--rounds', type=int, default=3, help="回放轮数，用于稳定计时 (默认: 3)")
+    parser.add_argument('--max-diffs', type=int, default=20, help="最多显示的差异条数 (默认: 20)")
+    args = parser.parse_args()
+
+    print_section_header("加载语料")
+    try:
+        if args.corpus:
+            records = load_corpus(args.corpus)
+            print(f"  - 语料: {args.corpus}")
+        else:
+            paths = args.logs or [settings.RAW_LOG_FILE]
+            records = load_raw_logs(paths)
+            print(f"  - 日志: {', '.join(paths)}")
+    except OSError as e:
+        print(f"  - ❌ 错误: 读取失败: {e}")
+        sys.exit(1)
+    print(f"  - 消息数: {len(records)} (其中带回复上下文: {sum(1 for r in records if r.get('reply_text'))})")
+    if not records:
+        print("  - 没有可回放的消息。")
+        sys.exit(1)
+    if args.save_corpus:
+        save_corpus(args.save_corpus, records)
+        print(f"  - 语料已保存至: {args.save_corpus}")
+
+    print_section_header("回放与计时")
+    rounds = max(1, args.rounds)
+    results, timings, elapsed = replay(records, rounds)
+    total_messages = len(records) * rounds
+    print(f"  - 回放 {rounds} 轮，共 {total_messages} 条，用时 {elapsed:.3f}s，吞吐 {total_messages / elapsed:,.0f} 条/秒")
+    for name, spent in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print(f"  - {name:<34} 总计 {spent * 1000:9.2f}ms  平均 {spent / total_messages * 1e6:8.2f}µs/条")
+
+    print_section_header("黄金文件比对")
+    if args.update_golden:
+        os.makedirs(os.path.dirname(args.golden) or '.', exist_ok=True)
+        with open(args.golden, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"  - 已写入黄金文件: {args.golden} ({len(results)} 条)")
+        return
+    if not os.path.exists(args.golden):
+        print(f"  - 黄金文件不存在: {args.golden}，请先使用 --update-golden 生成。")
+        return
+    with open(args.golden, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    changed = compare_with_golden(results, golden, args.max_diffs)
+    if changed:
+        print(f"  - ❌ 共 {changed} 条记录的解析结果发生变化。")
+        sys.exit(1)
+    print(f"  - ✅ 全部 {len(results)} 条记录与黄金文件一致。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import re
+
+import pytest
+
+from app.reply_waiters import compile_pattern, extract_literal_tokens
+
+CASES = [
+    (r"x{2}y", ["xxy", "xy", "2y", "xxxy"]),
+    (r"a{1,3}bc", ["abc", "aaabc", "bc", "1,3bc"]),
+    (r"获得\d{2,}灵石", ["获得12灵石", "获得1灵石", "获得灵石"]),
+    (r"[\]x]yz", ["]yz", "xyz", "yz", "\\yz"]),
+    (r"[^]x]yz", ["ayz", "]yz", "xyz"]),
+    (r"[]x]yz", ["]yz", "xyz", "ayz"]),
+    (r"a[|]b|cd", ["a|b", "cd", "ab"]),
+    (r"【(成功|失败)】.*奖励", ["【成功】获得奖励", "【失败】无奖励", "成功奖励"]),
+    (r"a{b}c", ["a{b}c", "ac"]),
+]
+
+
+@pytest.mark.parametrize("pattern, texts", CASES)
+def test_prefilter_agrees_with_regex(pattern, texts):
+    compiled = compile_pattern(pattern)
+    for text in texts:
+        assert compiled.matches(text) == bool(re.search(pattern, text, re.DOTALL)), (pattern, text)
+
+
+def test_quantifier_digits_are_not_literals():
+    assert extract_literal_tokens(r"x{2}y") != ("2",)
+    assert "1,3" not in (extract_literal_tokens(r"a{1,3}bc") or ())
+
+
+def test_ignorecase_skips_prefilter():
+    assert compile_pattern("成功ABC", re.IGNORECASE).matches("成功abc")